@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from xlsx2rdmo_lite.spreadsheet import Row, write_rows
+
+# Synthetic workbooks in the format of sample/sample.xlsx: one catalog with
+# `questions` questions, spread evenly over `sections` sections with
+# `questionsets` questionsets each. Every fourth question is a radio button
+# question sharing the same option set.
+
+SCALE = 'Gut | Good; Mittel | Fair; Schlecht | Poor'
+
+
+def generate_rows(questions, sections=10, questionsets=10, catalog='Benchmark'):
+    sets = sections * questionsets
+    for i in range(questions):
+        n = i % sets
+        yield Row({
+            'catalog': catalog,
+            'section': 'Section {}'.format(n // questionsets + 1),
+            'questionset': 'Questionset {}'.format(n % questionsets + 1),
+            'position': i // sets,
+            'frage_de': 'Frage {} zu einem synthetischen Thema mit etwas längerem Text'.format(i + 1),
+            'frage_en': 'Question {} about a synthetic topic with a somewhat longer text'.format(i + 1),
+            'defaultanswer_de': 'Antwort {}'.format(i + 1) if i % 3 == 0 else '',
+            'defaultanswer_en': 'Answer {}'.format(i + 1) if i % 3 == 0 else '',
+            'comment': 'generated' if i % 5 == 0 else '',
+            'widgettype': 'radio' if i % 4 == 3 else 'text',
+            'optionset': 'Scale' if i % 4 == 3 else '',
+            'options': SCALE if i == 3 else '',
+        })
+
+def generate(path, questions, sections=10, questionsets=10, catalog='Benchmark'):
+    write_rows(path, generate_rows(questions, sections, questionsets, catalog))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic workbook of questions.')
+    parser.add_argument('path', help='.xlsx or .csv file to write')
+    parser.add_argument('questions', type=int)
+    parser.add_argument('--sections', type=int, default=10)
+    parser.add_argument('--questionsets', type=int, default=10, help='questionsets per section')
+    args = parser.parse_args(argv)
+    generate(args.path, args.questions, args.sections, args.questionsets)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from generate import generate
+from xlsx2rdmo_lite import xlsx2rdmo_lite
+from xlsx2rdmo_lite.fake import FakeRDMO
+
+# Imports synthetic workbooks of increasing size into an in-memory RDMO
+# (FakeRDMO, optionally with simulated latency) and records per scale:
+# wall time of the import and its phases, the number of requests of the
+# first import and of a re-import of the unchanged workbook, and the peak
+# memory of reading and planning. Results are compared to a baseline, so
+# regressions - more requests per element, or time growing faster than the
+# workbook - fail the run.
+#
+#   python benchmarks/run.py --scales 10 100 1000 --compare benchmarks/baseline.json
+#   python benchmarks/run.py --save benchmarks/baseline.json
+
+# questions -> (sections, questionsets per section)
+SCALES = {
+    10: (2, 2),
+    100: (5, 4),
+    1000: (10, 10),
+    10000: (20, 25),
+    50000: (50, 40),
+}
+DEFAULT_SCALES = (10, 100, 1000, 10000)
+
+
+def _importer(latency, concurrency):
+    importer = xlsx2rdmo_lite(concurrency=concurrency, verbose=False)
+    fake = FakeRDMO(latency=latency)
+    importer.init_rdmo_access('http://benchmark', client=fake)
+    return importer, fake
+
+def measure(path, latency=0, concurrency=1):
+    importer, fake = _importer(latency, concurrency)
+    start = time.perf_counter()
+    importer.import_to_rdmo(path)
+    seconds = time.perf_counter() - start
+    phases = {name: stats['seconds'] for name, stats in importer.metrics.report()['phases'].items()}
+    requests = len(fake.requests)
+
+    del fake.requests[:]
+    start = time.perf_counter()
+    importer.import_to_rdmo(path)
+    reimport_seconds = time.perf_counter() - start
+    reimport_requests = len(fake.requests)
+
+    # memory of reading and planning only, without the fake instance
+    importer, fake = _importer(0, 1)
+    tracemalloc.start()
+    importer.plan(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'seconds': seconds,
+        'phases': phases,
+        'requests': requests,
+        'reimport_seconds': reimport_seconds,
+        'reimport_requests': reimport_requests,
+        'peak_memory': peak,
+    }
+
+def run(scales, latency=0, concurrency=1):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for questions in scales:
+            sections, questionsets = SCALES.get(questions, (10, 10))
+            path = generate(os.path.join(tmp, 'benchmark-{}.xlsx'.format(questions)), questions, sections, questionsets)
+            results[str(questions)] = measure(path, latency, concurrency)
+            print('{:>6} questions: {seconds:.2f} s, {requests} requests, re-import {reimport_requests} requests, '
+                  'peak {mb:.1f} MB'.format(questions, mb=results[str(questions)]['peak_memory'] / 2**20,
+                                            **results[str(questions)]), file=sys.stderr)
+    return {
+        'python': platform.python_version(),
+        'latency': latency,
+        'concurrency': concurrency,
+        'scales': results,
+    }
+
+def compare(results, baseline, tolerance=2.0):
+    # request counts must not grow at all, time and memory not beyond tolerance
+    regressions = []
+    for scale, result in results['scales'].items():
+        base = baseline['scales'].get(scale)
+        if base is None:
+            continue
+        for key in ('requests', 'reimport_requests'):
+            if result[key] > base[key]:
+                regressions.append('{} questions: {} {} > {}'.format(scale, key, result[key], base[key]))
+        if results['latency'] == baseline['latency'] and results['concurrency'] == baseline['concurrency']:
+            for key in ('seconds', 'reimport_seconds'):
+                if result[key] > base[key] * tolerance:
+                    regressions.append('{} questions: {} {:.2f} > {:.2f}'.format(scale, key, result[key], base[key]))
+        if result['peak_memory'] > base['peak_memory'] * tolerance:
+            regressions.append('{} questions: peak_memory {} > {}'.format(scale, result['peak_memory'], base['peak_memory']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark imports of synthetic workbooks into a fake RDMO.')
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help='numbers of questions (default: {})'.format(' '.join(map(str, DEFAULT_SCALES))))
+    parser.add_argument('--latency', type=float, default=0, help='simulated seconds per request')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--save', metavar='FILE', help='write the results as json, e.g. as new baseline')
+    parser.add_argument('--compare', metavar='FILE', help='baseline to compare with')
+    parser.add_argument('--tolerance', type=float, default=2.0,
+                        help='allowed factor of time and memory over the baseline (default: 2.0)')
+    args = parser.parse_args(argv)
+
+    results = run(args.scales, args.latency, args.concurrency)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1)
+    else:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('regression:', regression, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
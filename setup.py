@@ -128,8 +128,8 @@ setup(
     # For an analysis of "install_requires" vs pip's requirements files see:
     # https://packaging.python.org/discussions/install-requires-vs-requirements/
     install_requires=[
-        "rdmo_client @ git+https://github.com/jannefleischer/rdmo-client.git", 
-        'pandas', 'python-slugify'],  # Optional
+        'requests',
+        'python-slugify'],  # Optional
     # List additional groups of dependencies here (e.g. development
     # dependencies). Users will be able to install these using the "extras"
     # syntax, for example:
@@ -138,7 +138,9 @@ setup(
     #
     # Similar to `install_requires` above, these must be valid existing
     # projects.
-    extras_require={ 
+    extras_require={
+        'progress': ['tqdm'],
+        'async': ['httpx'],
     },
     # If there are data files included in your packages that need to be
     # installed, specify them here.
@@ -147,6 +149,9 @@ setup(
     # Entry points. The following would provide a command called `sample` which
     # executes the function `main` from this package when invoked:
     entry_points={  # Optional
+        "console_scripts": [
+            "xlsx2rdmo=xlsx2rdmo_lite.cli:main",
+        ],
     },
     # List additional URLs that are relevant to your project as a dict.
     #
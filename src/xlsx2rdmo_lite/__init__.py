@@ -1,525 +1,507 @@
+import asyncio
+import functools
+from contextlib import contextmanager
+import hashlib
 import io
+import logging
 import os
-import sys
 from textwrap import dedent, indent
 
-import pandas as pd
-import numpy as np
-from slugify import slugify #python-slugify
+from .attribute_cache import AttributeCache, check_entries, shared_attributes
+from .executor import AsyncExecutor, Executor
+from .fake import AsyncFakeRDMO, FakeRDMO
+from .instrument import Metrics
+from .journal import Journal, journal_path
+from .manifest import Manifest, load_changes
+from .model import Model, build_model
+from .keys import catalog_key
+from .log import Pretty, configure, log, progress_bar, reset
+from .plan import Plan, make_delete_plan, make_plan
+from .rdmo_xml import write_xml
+from .sheet_export import catalog_rows
+from .snapshot import Snapshot
+from .spreadsheet import read_options, read_rows, write_rows
+from .validate import Report, ValidationError, Validator, check_model, validate
 
-from rdmo_client import Client
+def measured(method):
+    # every public run gets a fresh Metrics (see instrument.py); nested runs,
+    # like plan() within import_to_rdmo(), add to the outer one
+    @contextmanager
+    def measuring(self):
+        self.metrics = Metrics(self.profile, sizes=self.report_path is not None)
+        self._measuring = True
+        try:
+            with self.metrics:
+                yield
+        finally:
+            self._measuring = False
+            if self.report_path is not None:
+                self.metrics.save(self.report_path)
+
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def run_async(self, *args, **kwargs):
+            if self._measuring:
+                return await method(self, *args, **kwargs)
+            with measuring(self):
+                return await method(self, *args, **kwargs)
+        return run_async
 
-from requests.exceptions import HTTPError
+    @functools.wraps(method)
+    def run(self, *args, **kwargs):
+        if self._measuring:
+            return method(self, *args, **kwargs)
+        with measuring(self):
+            return method(self, *args, **kwargs)
+    return run
 
-try:
-    from IPython.display import display, Markdown
-except:
-    display = print
-    Markdown = str
+class xlsx2rdmo_lite:
 
-# HiddenPrints-class taken from https://stackoverflow.com/a/45669280/4649719 
-# (licensed under CC-BY-SA 4.0; (c) Alexander C [stackoverflow-username])
-class HiddenPrints:
-    def __init__(self, debug=False):
+    def __init__(self, debug=False, concurrency=1, cache_dir=None, cache_max_age=3600, report_path=None, profile=None,
+                 verbose=True, progress=False, dry_run=False, journal=True, attribute_cache=None):
+        # progress and diagnostics are logged (see log.py); verbose: show the
+        # progress messages, debug: every request and response as well,
+        # progress: a progress bar (tqdm) while executing a plan
         self.debug = debug
-        
-    def __enter__(self):
-        if self.debug==True:
-            pass
-        else:
-            self._original_stdout = sys.stdout
-            sys.stdout = open(os.devnull, 'w')
+        self.progress = progress
+        # dry_run: plans are executed against an in-memory copy of the
+        # instance (fake.py) instead of the instance itself
+        self.dry_run = dry_run
+        # journal: log the progress of imports next to the (first) workbook,
+        # so an import, which crashed or timed out, can be resumed
+        self.journal = journal
+        self._journal = None
+        self._resume = False
+        if debug:
+            configure(logging.DEBUG)
+        elif verbose:
+            configure(logging.INFO)
+        else: #quiet again after an earlier verbose instance, logging of the application is kept
+            reset()
+        self.concurrency = concurrency #number of parallel requests while importing
+        # with a cache_dir, the snapshot of the server is kept on disk and
+        # reused for cache_max_age seconds instead of listing everything again
+        self.cache_dir = cache_dir
+        self.cache_max_age = cache_max_age
+        # attribute_cache: sqlite file of the question attributes each catalog
+        # uses (see attribute_cache.py), shared by all imports into the
+        # instance to report questions of different catalogs colliding on
+        # the same key; by default attributes.sqlite in the cache_dir
+        if attribute_cache is None and cache_dir is not None:
+            attribute_cache = os.path.join(cache_dir, 'attributes.sqlite')
+        self.attribute_cache = attribute_cache
+        self._shared = None #shared_attributes() of the planned workbooks
+        self._state = None
+        self._prefetched = None #snapshot listed by the async import
+        self._access = None
+        self.manifests = []
+        # timings and request counts of the last run (self.metrics.report()),
+        # also written to report_path as json; profile: path of a cProfile dump
+        self.report_path = report_path
+        self.profile = profile
+        self.metrics = Metrics()
+        self._measuring = False
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.debug==True:
-            pass
-        else:
-            sys.stdout.close()
-            sys.stdout = self._original_stdout
+    @property
+    def state(self):
+        if self._state is None:
+            self._state = Snapshot.load(
+                self._client(), self._snapshot_cache(), self._server(), self.cache_max_age, self.uri_prefix
+            )
+        return self._state
 
-class xlsx2rdmo_lite:
+    def _client(self, client=None):
+        client = self.client if client is None else client
+        return self.metrics.wrap(client) if self._measuring else client
 
-    def __init__(self, debug=False):
-        self.debug = debug
-        pass
+    def _server(self):
+        return (self.base_url, self.uri_prefix)
+
+    def _snapshot_cache(self):
+        if self.cache_dir is None:
+            return None
+        name = hashlib.sha1(' '.join(self._server()).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, 'snapshot-' + name + '.json')
+
+    @property
+    def attributes(self):
+        return self.state.attributes
+            
+    @measured
+    def import_to_rdmo(self, xlsx_path, incremental=False, prune=False, resume=False):
+        # resume: continue an import, which crashed or timed out, from its journal
+        with self._journaled([xlsx_path], resume):
+            plan = self.plan(xlsx_path, incremental, prune)
+            self._execute(plan)
+        self._save_manifests()
+        self._record_attributes()
+        return plan
 
-        
-    def display(self, obj):
+    @measured
+    def import_many(self, xlsx_paths, processes=None, incremental=False, prune=False, resume=False):
+        # one catalog per workbook; all workbooks are planned against the same
+        # snapshot of the server and sent as one plan
+        xlsx_paths = list(xlsx_paths)
+        with self._journaled(xlsx_paths, resume):
+            plan = self.plan_many(xlsx_paths, processes, incremental, prune)
+            self._execute(plan)
+        self._save_manifests()
+        self._record_attributes()
+        return plan
+
+    @measured
+    async def import_to_rdmo_async(self, xlsx_path, incremental=False, prune=False, client=None):
+        # import_to_rdmo() on the running event loop: the server is listed
+        # with all collections at once and the plan is sent with up to
+        # concurrency requests in flight. client: an object with the methods
+        # of the client as coroutines (e.g. fake.AsyncFakeRDMO); by default an
+        # async_transport.AsyncClient with the settings of init_rdmo_access(),
+        # which needs httpx. An import, which failed, is resumed with
+        # import_to_rdmo(path, resume=True).
+        own = client is None and self._access is not None
+        client = self._async_client(client)
         try:
-            if (type(obj)==pd.DataFrame or type(obj)==pd.Series or type(obj)==Markdown):
-                display(obj)
-        except:
-            print(obj)
+            with self._journaled([xlsx_path], False):
+                with self.metrics.phase('snapshot'):
+                    self._prefetched = await Snapshot.load_async(
+                        self._client(client), self._snapshot_cache(), self._server(), self.cache_max_age,
+                        self.uri_prefix
+                    )
+                # reading and planning don't wait for the server, but would
+                # block the loop
+                loop = asyncio.get_running_loop()
+                plan = await loop.run_in_executor(None, self.plan, xlsx_path, incremental, prune)
+                await self._execute_async(plan, client)
+        finally:
+            self._prefetched = None
+            if own:
+                await client.aclose()
+        self._save_manifests()
+        self._record_attributes()
+        return plan
+
+    def _async_client(self, client=None):
+        if client is not None:
+            return client
+        if self._access is None: #the client passed to init_rdmo_access()
+            return self.client
+        from .async_transport import AsyncClient
+        base_url, credentials, options = self._access
+        return AsyncClient(base_url, max_in_flight=max(1, self.concurrency), **credentials, **options)
+
+    @contextmanager
+    def _journaled(self, xlsx_paths, resume):
+        if self.journal and not self.dry_run and xlsx_paths:
+            path = journal_path(xlsx_paths[0], self.cache_dir)
+            if path is None:
+                log.warning('the directory of %s is read-only, importing without a journal', xlsx_paths[0])
+            else:
+                self._journal = Journal(path, self._server(), xlsx_paths)
+        self._resume = resume
         try:
-            from pprint import pprint
-            pprint(obj)
-        except:
-            print(obj)
-            
-    def import_to_rdmo(self, xlsx_path):
-        self._read_xlsx(xlsx_path)
-        self._create_catalog()
-        self._create_sections_and_pages()
-        self._create_questionsets()
-        self._create_questions()
-
-    def init_rdmo_access(self, base_url, auth=('admin','admin'), token=None, uri_prefix=None):
+            yield
+        finally:
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = None
+            self._resume = False
+
+    @measured
+    def plan(self, xlsx_path, incremental=False, prune=False):
+        # computes the whole desired state from the sheet and diffs it against
+        # the server, without sending any write request
+        if incremental:
+            return self.plan_many([xlsx_path], 1, incremental, prune)
+        log.info('Plan %s', xlsx_path)
+        self.manifests = []
+        self.model = self._read_model(xlsx_path)
+        self._shared = list(shared_attributes(self.model, xlsx_path)) if self.attribute_cache else None
+        return self._plan_model()
+
+    @measured
+    def plan_many(self, xlsx_paths, processes=None, incremental=False, prune=False):
+        # incremental: only rows, which are new or changed since the last
+        # incremental import (see manifest.py), are planned
+        # prune: questions of rows deleted from the sheet are removed, too
+        xlsx_paths = list(xlsx_paths)
+        log.info('Plan %s', ', '.join(str(path) for path in xlsx_paths))
+        if incremental:
+            manifests = [Manifest.load(path, self._server()) for path in xlsx_paths]
+            with self.metrics.phase('snapshot'):
+                # the ids of the manifests are checked against the server
+                self._state = self._prefetched
+                state = self.state
+            stale = sum(manifest.verify(state) for manifest in manifests)
+            if stale:
+                log.info('%d row(s) of the manifest are gone from the server and are imported again', stale)
+            jobs = (load_changes, xlsx_paths, manifests)
+        else:
+            state = None
+            jobs = (check_model, xlsx_paths)
+        with self.metrics.phase('read'):
+            if len(xlsx_paths) > 1 and processes != 1:
+                # workbooks are read and slugified in parallel worker processes
+                from concurrent.futures import ProcessPoolExecutor
+                with ProcessPoolExecutor(processes) as pool:
+                    results = list(pool.map(*jobs))
+            else:
+                results = list(map(*jobs))
+
+        self.model = Model()
+        self.manifests = []
+        # with several workbooks, their questions are compared even without the cache
+        self._shared = [] if self.attribute_cache or len(xlsx_paths) > 1 else None
+        deleted = {}
+        report = Report()
+        for path, result in zip(xlsx_paths, results):
+            if incremental:
+                model, manifest, gone, sheet_report = result
+                self.manifests.append(manifest)
+                deleted.update(gone)
+            else:
+                model, sheet_report = result
+            report.extend(sheet_report)
+            if model is not None:
+                if self._shared is not None: #before merging, which keeps the first of colliding questions
+                    self._shared.extend(shared_attributes(model, path))
+                self.model.merge(model)
+        self._check(report)
+
+        removed = None
+        if deleted:
+            log.info('%d row(s) deleted from the sheet%s', len(deleted),
+                     '' if prune else ', use prune=True to remove their questions')
+            if prune:
+                removed = {question: entry['questionset'] for question, entry in deleted.items()}
+        if incremental and not self.model.catalogs and not removed:
+            self.manifests = [] #nothing to save either
+            log.info('no changed rows, nothing to do')
+            return Plan()
+        self._prune = prune
+        return self._plan_model(removed, state)
+
+    def _read_model(self, xlsx_path):
+        validator = Validator(xlsx_path)
+        with self.metrics.phase('read'):
+            # rows are streamed into the model and checked on the way
+            model = build_model(
+                validator.check(self._read_xlsx(xlsx_path)), validator.check_options(read_options(xlsx_path))
+            )
+        self._check(validator.report)
+        return model
+
+    def validate(self, xlsx_path):
+        # all issues of the sheet, without raising
+        return validate(xlsx_path)
+
+    def _check(self, report):
+        # before any request: errors stop the import, warnings are logged
+        for issue in report.warnings:
+            log.warning('%s:%s: %s', issue.path, issue.line, issue.message)
+        if not report.ok:
+            self.manifests = []
+            raise ValidationError(report)
+
+    def _plan_model(self, removed=None, state=None):
+        # state: listed before reading; otherwise a new snapshot (or the
+        # cached one) for every import
+        self._state = state if state is not None else self._prefetched
+        with self.metrics.phase('snapshot'):
+            if self._resume:
+                self._state = self._resumed_state()
+            state = self.state
+        with self.metrics.phase('plan'):
+            if self._shared is not None and self.attribute_cache:
+                self._check(self._attributes().check(self._shared, state, Report()))
+            elif self._shared is not None:
+                self._check(check_entries(self._shared, Report()))
+            plan = make_plan(self.model, state, self.uri_prefix, removed)
+        log.info('%s', plan.summary())
+        return plan
+
+    def _attributes(self):
+        return AttributeCache(self.attribute_cache, self._server())
+
+    def _record_attributes(self):
+        # the attributes the imported questions use, for the next imports
+        shared, self._shared = self._shared, None
+        if not shared or not self.attribute_cache or self.dry_run:
+            return
+        with self.metrics.phase('attributes'):
+            n = self._attributes().record(shared, self.state)
+        log.debug('%d attribute(s) recorded in %s', n, self.attribute_cache)
+
+    def _resumed_state(self):
+        if self._journal is None or not self._journal.exists():
+            log.warning('no journal to resume from, starting over')
+            return None
+        state = self._journal.load(self._client())
+        if state is None:
+            log.warning('the journal %s belongs to another import, starting over', self._journal.path)
+        else:
+            log.info('resuming from %s', self._journal.path)
+        return state
+
+    def _save_manifests(self):
+        if self.dry_run:
+            self.manifests = []
+            return
+        with self.metrics.phase('manifest'):
+            for manifest in self.manifests:
+                manifest.save(self.state, pruned=self._prune)
+        self.manifests = []
+
+    def init_rdmo_access(self, base_url, auth=('admin','admin'), token=None, uri_prefix=None,
+                         timeout=(5, 60), retries=3, rate_limit=None, client=None):
+        # timeout: seconds to connect and to wait for a response; retries:
+        # additional tries after connection errors, timeouts and 429/502/503/504
+        # (POSTs only if they didn't reach the server); rate_limit: maximum
+        # requests per second. client: any object with the methods of
+        # rdmo_client.Client, instead of the built-in transport
         self.base_url = base_url
         if uri_prefix is None:
             self.uri_prefix = base_url + '/instance'
-        if not token is None: #preferring token over basic auth
+        else:
+            self.uri_prefix = uri_prefix
+        from .transport import Client #requests is only loaded once an instance is accessed
+        options = dict(timeout=timeout, retries=retries, rate_limit=rate_limit)
+        self._access = None
+        if client is not None:
+            self.client = client
+        elif not token is None: #preferring token over basic auth
             self.token = token #admintoken!
-            self.client = Client(base_url, token=self.token)
+            self._access = (base_url, {'token': self.token}, options)
+            self.client = Client(base_url, token=self.token, pool_size=max(10, self.concurrency), **options)
         elif auth:
             self.auth = auth
-            self.client = Client(base_url, auth=self.auth)
+            self._access = (base_url, {'auth': self.auth}, options)
+            self.client = Client(base_url, auth=self.auth, pool_size=max(10, self.concurrency), **options)
+        self._state = None
 
     def _read_xlsx(self, xlsx_path):
-        df_from_excel = pd.read_excel(xlsx_path).replace(np.NaN, '')
-        self.df_from_excel = df_from_excel.set_index([0,1,2,3])
-        return self.df_from_excel
+        # .xlsx, .ods or .csv; yields one spreadsheet.Row per line
+        return read_rows(xlsx_path)
+
+    @measured
+    def delete(self, catalog=None):
+        # catalog: uri_path or title of a catalog; only its elements (and the
+        # attributes of its questions), which no other catalog uses, are
+        # destroyed. Without a catalog everything is destroyed.
+        log.info('Delete %s', 'everything' if catalog is None else catalog)
+        self._state = None
+        with self.metrics.phase('snapshot'):
+            state = self.state
+        if catalog is not None:
+            catalog_obj = state.get('catalog', catalog) or state.get('catalog', catalog_key(catalog))
+            if catalog_obj is None:
+                raise KeyError('catalog not found: {}'.format(catalog))
+            catalog = catalog_obj
+        with self.metrics.phase('plan'):
+            plan = make_delete_plan(state, catalog)
+        log.info('%s', plan.summary())
+        self._execute(plan)
+        return plan
 
     def _delete_everything_format_c(self):
-        for x in self.client.list_questions():
-            self.client.destroy_question(x['id'])
-        for x in self.client.list_questionsets():
-            self.client.destroy_questionset(x['id'])
-        for x in self.client.list_sections():
-            self.client.destroy_section(x['id'])
-        for x in self.client.list_pages():
-            self.client.destroy_page(x['id'])
-        for x in self.client.list_catalogs():
-            self.client.destroy_catalog(x['id'])
-        for x in self.client.list_attributes():
-            with HiddenPrints(self.debug):
-                try: 
-                    self.client.destroy_attribute(x['id']) #in try-block, because it also deletes nested attributes in a cascaded matter.
-                except HTTPError: pass
-            
-    def _create_catalog(self):
-        self.display(Markdown('### Create Catalog'))
-        title_catalog = self.df_from_excel.index.get_level_values(0).unique().item()
-        catalog_key = 'catalog-'+slugify(title_catalog)
-        catalog_obj = {
-            "uri_prefix": self.uri_prefix,
-            "uri_path": catalog_key,
-            'title_de': title_catalog,
-            'title_en': title_catalog
-        }
-        try:
-            with HiddenPrints(self.debug):
-                self.catalog = self.client.create_catalog(
-                    catalog_obj
-                )
-            if self.debug:
-                self.display(Markdown('**catalog created** (ID: ' +str(self.catalog['id'])+ ')'))
-                self.display(self.catalog)
-        except:
-            with HiddenPrints(self.debug):
-                self.catalog = self.client.update_catalog(
-                    [x for x in self.client.list_catalogs() if x['uri_path']==catalog_key][0]['id'],
-                    catalog_obj
-                )
-            if self.debug:
-                self.display(Markdown('**catalog updated** (ID: ' +str(self.catalog['id'])+ ')'))
-                self.display(self.catalog)
-        return self.catalog
-            
-    def _create_sections_and_pages(self):
-        self.display(Markdown('### Create Sections and pages'))
-        #also includes creation of corresponding attributes
-        section_names = list(self.df_from_excel.index.get_level_values(1).unique())
-        for section_name in section_names:
-
-            ## Attribute Section Rootpoint
-            section_attrib_name = slugify(
-                # '{}_{}'.format(
-                #     self.catalog['title'],
-                #     section_name
-                # )
-                section_name
-            )
-            attrib_obj = {
-                "uri_prefix": self.uri_prefix,
-                "key": section_attrib_name,
-            }
-            with HiddenPrints(self.debug):
-                try:
-                    attribute = self.client.create_attribute(
-                        attrib_obj
-                    )
-                    if self.debug:
-                        self.display(Markdown('**attribute created** (ID: ' +str(attribute['id'])+ ')'))
-                        self.display(attrib_obj)
-                        self.display(attribute)
-                except Exception as e:
-                    attribute = self.client.update_attribute(
-                        [x for x in self.client.list_attributes() if x['key'] == section_attrib_name][0]['id'],
-                        attrib_obj
-                    )
-                    if self.debug:
-                        self.display(Markdown('**attribute updated** (ID: ' +str(attribute['id'])+ ')'))
-                        self.display(attrib_obj)
-                        self.display(attribute)
+        return self.delete()
 
-            
-            ## Section
-            section_name_slugged = slugify(
-                '{}_{}'.format(
-                    self.catalog['title'],
-                    section_name
-                )
-            )
-            section_obj = {
-                "uri_prefix": self.uri_prefix,
-                "uri_path": section_name_slugged,
-                "title_en": section_name,
-                "title_de": section_name
-            }
-            with HiddenPrints(self.debug):
-                try:
-                    section = self.client.list_sections(
-                        **section_obj
-                    )[0]
-                except IndexError:
-                    try:
-                        section = self.client.create_section(
-                            section_obj
-                        )
-                    except Exception as e:
-                        self.display(
-                            "The requested section ({}) does not exist, and it can't be created, too. Something is wrong...".format(section_name_slugged)
-                        )
-                        raise e
-                    else:
-                        if self.debug:
-                            self.display(Markdown('**section created** (ID: ' +str(section['id'])+ ')'))
-                            self.display(section_obj)
-                            self.display(section)
-                else:
-                    self.client.update_section(
-                        section['id'],
-                        section
-                    )
-                    if self.debug:
-                        self.display(Markdown('**section updated** (ID: ' +str(section['id'])+ ')'))
-                        self.display(section_obj)
-                        self.display(section)
-                if section['id'] in self.catalog['sections']:
-                    self.display(Markdown(
-                        '*Section has already been added to catalog (sID: {}, cID: {})'.format(section['id'], self.catalog['id'])
-                    ))
-                else:
-                    self.catalog['sections'] = self.catalog['sections'] + [{'section': section['id'], 'order': (
-                        max(
-                            [f['order'] for f in self.catalog['sections']]
-                        )+1 if len(
-                            self.catalog['sections']
-                        )>0 else 1
-                    )}]
-                    self.catalog = self.client.update_catalog(
-                        self.catalog['id'],
-                        self.catalog
-                    )
-                if self.debug:
-                    self.display(Markdown('**catalog updated with section** (ID: ' +str(section['id'])+ ')'))
-                    # self.display(section)
-                    # self.display(oldcatalog)
-                    # self.display(self.catalog)
-
-            ## Page
-            page_obj = {
-                "uri_prefix": self.uri_prefix,
-                "uri_path": 'page-' + section_name_slugged,
-                "title_en": section_name,
-                "title_de": section_name
-            }
-            with HiddenPrints(self.debug):
-                try:
-                    pages = self.client.list_pages(
-                        **page_obj
-                    )
-                    if len(pages)>1:
-                        raise Exception('multiple pages exist. Cant be in this limited importer...')
-                    page = pages[0]
-                except:
-                    page = self.client.create_page(
-                        page_obj
-                    )
-                    if self.debug:
-                        self.display(Markdown('**page created** (ID: ' +str(page['id'])+ ')'))
-                        self.display(page)
-                if page['id'] in [f['page'] for f in section['pages']]:
-                    self.display(Markdown('*Page is already added to section* (pID: {}, sID: {})'.format(page['id'], section['id'])))
-                else:
-                    section['pages'] = section['pages'] + [{'page': page['id'], 'order': (
-                        max(
-                            [f['order'] for f in section['pages']]
-                        )+1 if len(
-                            section['pages']
-                        )>0 else 1
-                    )}]
-                    section = self.client.update_section(
-                        section['id'],
-                        section
-                    )
-                    if self.debug:
-                        self.display(Markdown('**section updated with page (ID: {})'.format(section['id'])))
-                        self.display(section)
-
-    def _create_questionsets(self):
-        self.display(Markdown('### Create Questionsets'))
-        results = []
-        questionsets = {
-            x: None 
-            for x in zip(
-                self.df_from_excel.index.get_level_values(0),
-                self.df_from_excel.index.get_level_values(1),
-                self.df_from_excel.index.get_level_values(2)
-            )
-        } #hack for uniquing two cols.
-        
-        for i, ((catalog_name, section_name, questionset_name), _none) in enumerate(questionsets.items()):
-            self.display(Markdown('*Questionset ' + str(i+1) + ' of ' + str(len(questionsets.keys()))+'*'))
-
-            ## Attribute
-            attrib_name = slugify(
-                '{}_{}'.format(
-                    section_name,
-                    slugify(questionset_name, max_length=100)
-                )
-            )
-            section_attrib_name = slugify(
-                # '{}_{}'.format(
-                #     catalog_name,
-                #     section_name
-                # )
-                section_name
-            )
-            try:
-                attrib_obj = {
-                    "uri_prefix": self.uri_prefix,
-                    "key": attrib_name,
-                    "parent": [x for x in self.client.list_attributes() if x['key'] == section_attrib_name][0]['id']
-                }
-            except IndexError as e:
-                self.display(section_attrib_name)
-                raise e
-            with HiddenPrints(self.debug):
-                try:
-                    attribute = self.client.create_attribute(
-                        attrib_obj
-                    )
-                    self.display(Markdown('**created attribute**: ' + attrib_name + ' (ID:'+str(attribute['id'])+')'))
-                except Exception as e:
-                    attribute = self.client.update_attribute(
-                        [x for x in self.client.list_attributes() if x['key'] == attrib_name][0]['id'],
-                        attrib_obj
-                    )
-                self.display(Markdown('**updated attribute**: ' + attrib_name + ' (ID:'+str(attribute['id'])+')'))
-            if self.debug:
-                self.display(attribute)
-
-            ## Questionset
-            questionset_name_slugged = slugify(
-                '{}_{}_{}'.format(
-                    catalog_name,
-                    section_name,
-                    slugify(questionset_name, max_length=100)
-                )
-            )
-            questionset_obj={
-                "uri_prefix": self.uri_prefix,
-                "uri_path": questionset_name_slugged,
-                "title_en": questionset_name,
-                "title_de": questionset_name
-            }
-            with HiddenPrints(self.debug):
-                try:
-                    questionset = self.client.list_questionsets(
-                        **questionset_obj
-                    )[0]
-                except IndexError:
-                    try:
-                        questionset = self.client.create_questionset(questionset_obj)
-                        self.display(Markdown('**created questionset**: ' + questionset_name_slugged + ' (ID:'+str(questionset['id'])+')'))
-                    except Exception as e:
-                        self.display(Markdown('***Something went wrong***, when creating questionset ({})'.format( questionset_name_slugged )))
-                        raise e
-                # except KeyboardInterrupt:
-                #     raise
-                
-            ## Page update
-            
-            page_name_slugged = slugify(
-                'page-{}_{}'.format(
-                    self.catalog['title'],
-                    section_name
-                )
-            )
-            try:
-                page = self.client.list_pages(
-                    **{
-                        "uri_prefix": self.uri_prefix,
-                        'uri_path': page_name_slugged,
-                    }
-                )[0]
-            except IndexError as e:
-                self.display(page_name_slugged)
-                self.display(
-                    'Something went wrong while creating a questionset ({}), or more specific while adding the questionset to a page ({})'.format(
-                        questionset_name_slugged,
-                        page_name_slugged
-                    )
-                )
-                raise e
-            else:
-                try:
-                    if questionset['id'] in [f['questionset'] for f in page['questionsets']]:
-                        self.display(Markdown('*Questionset is already added to page (qID: {}, pID: {})'.format(questionset['id'], page['id'])))
-                    else:
-                        page['questionsets'] = page['questionsets'] + [{'questionset': questionset['id'], 'order': (
-                                    max(
-                                        [f['order'] for f in page['questionsets']]
-                                    )+1 if len(
-                                        page['questionsets']
-                                    )>0 else 1
-                                )}]
-                        page = self.client.update_page(
-                            page['id'],
-                            page
-                        )
-                except:
-                    raise Exception('Something went wrong, when updating the page ({}) with new questionset ({})'.format(page['id'], questionset['id']))
-            
-                self.display(Markdown('**updated page with questionset**: ' + questionset_name_slugged + ' (ID:'+str(questionset['id'])+')'))
-            if self.debug:
-                self.display(questionset)
-                
-            questionset['custom_section']=section_attrib_name
-            results.append(questionset)
-        return results
-
-    def _create_questions(self):
-        self.display(Markdown('### Create Questions'))
-        
-        for i, (row, question_series) in enumerate(
-            self.df_from_excel[self.df_from_excel['widgettype']=="text"].reset_index().iterrows()
-        ):
-            self.display(Markdown('*Question ' + str(i+1) + ' of ' + str(self.df_from_excel.index.size) + '*'))
-        
-            attrib_name = slugify(
-                "{}_{}_{}".format(
-                    question_series[1],
-                    slugify(question_series[2], max_length=100),
-                    slugify(question_series['frage_de'], max_length=100)
-                )
-            )[:110]
-            attrib_obj = {
-                "uri_prefix": self.uri_prefix,
-                "key": attrib_name,
-                "parent": [
-                    x for x 
-                    in self.client.list_attributes() #
-                    if x['key'] == slugify(
-                        '{}_{}'.format(
-                            question_series[1],
-                            slugify(question_series[2], max_length=100)
-                        )
-                    )
-                ][0]['id']
-            }
-            with HiddenPrints(self.debug):
-                try:
-                    attribute = self.client.create_attribute(
-                        attrib_obj
-                    )
-                    self.display(Markdown('**created attribute** (ID: ' + str(attribute['id']) + ')'))
-                except Exception as e:
-                    attribute = self.client.update_attribute(
-                        [x for x in self.client.list_attributes() if x['key'] == attrib_name][0]['id'],
-                        attrib_obj
-                    )
-                self.display(Markdown('**updated attribute** (ID: ' + str(attribute['id']) + ')'))
-            if self.debug:
-                self.display(attribute)
-            
-            # display(question_series.to_frame())
-
-            question_name = 'question-'+attrib_name
-            question_obj = {
-                "uri_prefix": self.uri_prefix,
-                "uri_path": question_name,
-                "comment": question_series['comment'],
-                # "questionsets": [
-                #     questionset['id'] #does this work? or d I need to update the questionset?
-                # ],
-                "attribute": [x for x in self.client.list_attributes() if x['key'] == attrib_name][0]['id'],
-                "text_en": question_series['frage_en'],
-                "default_text_en": question_series['defaultanswer_en'],
-                "text_de": question_series['frage_de'],
-                "default_text_de": question_series['defaultanswer_de'],
-                "value_type": 'text',
-                "widget_type": question_series['widgettype']
-            }
-            with HiddenPrints(self.debug):
-                questions = self.client.list_questions(
-                    **{key: value for key, value in question_obj.items() if key in ["uri_prefix", "uri_path", "attribute"]} 
-                )
-                if len(questions)>1:
-                    raise Exception('More questions found then expected (ID: {})'.format(str([f['if'] for f in questions])))
-                elif len(questions)==0:
-                    question = self.client.create_question(
-                        question_obj
-                    )
-                    self.display(Markdown('**created question** (ID: {}'.format(question['id'])))
-                else:
-                    question = questions[0]
-                    question.update(question_obj)
-                    question = self.client.update_question(
-                        question['id'],
-                        question
-                    )
-                    self.display(Markdown('**updated question** (ID: ' + str(question['id']) + ')'))
-
-            with HiddenPrints(self.debug):
-                questionset_name = slugify(
-                    '{}_{}_{}'.format(
-                        question_series[0],
-                        question_series[1],
-                        slugify(question_series[2], max_length=100)
-                    )
-                )
-                questionset = self.client.list_questionsets(
-                    uri_path=questionset_name
-                )[0]
-                if question['id'] in [f['question'] for f in questionset['questions']]:
-                    self.display('*Question has already been added to questionset* (ID: {})'.format(questionset['id']))
-                else:
-                    self.display(Markdown('*old questionset*'))
-                    self.display(questionset)
-                    questionset['questions'] = questionset['questions'] + [{
-                        'question': question['id'],
-                        'order': (
-                            max(
-                                [f['order'] for f in questionset['questions']]
-                            )+1 if len(
-                                questionset['questions']
-                            )>0 else 1
-                        )
-                    }]
-                    questionset = self.client.update_questionset(
-                        questionset['id'],
-                        questionset
-                    )
-                    self.display(Markdown('*modified questionset*'))
-                    self.display(questionset)
-                    if self.debug:
-                        self.display(Markdown('**Updated Questionset with questions** (ID: {})'.format(questionset['id'])))
+    @measured
+    def export_xml(self, xlsx_path, out_path, uri_prefix=None):
+        # writes the catalog of the sheet as RDMO xml, to be imported in one
+        # upload instead of request by request; no access to RDMO needed
+        uri_prefix = uri_prefix or getattr(self, 'uri_prefix', None)
+        if uri_prefix is None:
+            raise ValueError('uri_prefix is required, if init_rdmo_access() was not called')
+        log.info('Export %s to %s', xlsx_path, out_path)
+        model = self._read_model(xlsx_path) #checked like an import, nothing is written for an invalid sheet
+        with self.metrics.phase('write'), open(out_path, 'wb') as f:
+            write_xml(model, f, uri_prefix)
+        return model
 
+    @measured
+    def export_xlsx(self, catalog, out_path):
+        # writes a catalog of the server (uri_path or title) as a sheet in the
+        # layout the importer reads (.xlsx or .csv)
+        log.info('Export %s to %s', catalog, out_path)
+        self._state = None
+        with self.metrics.phase('snapshot'):
+            state = self.state
+        catalog_obj = state.get('catalog', catalog) or state.get('catalog', catalog_key(catalog))
+        if catalog_obj is None:
+            raise KeyError('catalog not found: {}'.format(catalog))
+        with self.metrics.phase('write'):
+            write_rows(out_path, catalog_rows(state, catalog_obj))
 
+    def _execute(self, plan):
+        with self._execution(plan) as executor:
+            executor.run(plan)
 
+    async def _execute_async(self, plan, client):
+        with self._execution(plan, client, asynchronous=True) as executor:
+            await executor.run(plan)
 
+    @contextmanager
+    def _execution(self, plan, client=None, asynchronous=False):
+        # the executor of the plan, with the journal, progress and logging
+        # around it
+        log.info('Execute plan')
+        total = len(plan)
+        done = [0]
+        debug = log.isEnabledFor(logging.DEBUG) #checked once, not per operation
+        bar = progress_bar(total, 'import') if self.progress and total else None
+        client = self.client if client is None else client
+        if self.dry_run:
+            # the copy checks the plan like RDMO would (uniqueness, references)
+            state = self.state.copy()
+            latency = client.latency if isinstance(client, FakeRDMO) else 0
+            fake = AsyncFakeRDMO if asynchronous else FakeRDMO
+            client = self._client(fake.from_snapshot(state, latency=latency))
+        else:
+            state = self.state
+            client = self._client(client)
+
+        journal = self._journal
+        if journal is not None:
+            if journal.exists() and not self._resume:
+                log.warning('%s of an unfinished import is replaced, use resume=True to continue it', journal.path)
+            try:
+                journal.start(state)
+            except OSError as e:
+                log.warning('cannot write the journal, importing without one: %s', e)
+                journal.close()
+                journal = self._journal = None
 
+        def on_done(op, obj):
+            done[0] += 1
+            if journal is not None:
+                journal.done(op, obj)
+            if bar is not None:
+                bar.update()
+            if self.dry_run:
+                log.info('would %s', op)
+            if debug:
+                log.debug('%d of %d %s (ID: %s)', done[0], total, op, obj.get('id') if obj else None)
+                log.debug('%s', Pretty(obj))
 
-        
\ No newline at end of file
+        with self.metrics.phase('execute'):
+            try:
+                yield (AsyncExecutor if asynchronous else Executor)(
+                    client, state, self.concurrency, on_done, journal.started if journal is not None else None
+                )
+            except:
+                # the outcome of the failed request is unknown
+                if not self.dry_run:
+                    Snapshot.invalidate(self._snapshot_cache())
+                if journal is not None:
+                    log.error('import failed, resume=True continues from %s', journal.path)
+                raise
+            finally:
+                if bar is not None:
+                    bar.close()
+        if journal is not None:
+            journal.remove()
+        if self.cache_dir is not None and total and not self.dry_run:
+            self.state.save(self._snapshot_cache(), self._server())
+        log.info('%s%s', 'dry run: ' if self.dry_run else '', ', '.join(
+            '{} {}'.format(n, outcome) for outcome, n in plan.totals().items() if n or outcome != 'destroyed'
+        ))
@@ -0,0 +1,92 @@
+import asyncio
+
+from .transport import RETRY_STATUS, Client, RateLimiter, error_message
+
+# The transport of transport.py on asyncio (httpx): the same list_*,
+# create_*, update_* and destroy_* methods, as coroutines, with the same
+# retries, backoff and rate limit. A bounded semaphore caps the requests in
+# flight, however many operations the executor has started, so a single
+# event loop thread can keep many requests open without a thread each.
+
+
+class AsyncClient(Client):
+    def __init__(self, base_url, auth=None, token=None, timeout=(5, 60), retries=3,
+                 backoff=0.5, max_backoff=30, rate_limit=None, max_in_flight=10):
+        # max_in_flight: requests sent at the same time, also the size of
+        # the connection pool; the other arguments are those of Client
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError('the async client requires httpx: pip install xlsx2rdmo_lite[async]') from None
+        self.httpx = httpx
+        self.base_url = base_url.rstrip('/') + '/'
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiter = None if not rate_limit else RateLimiter(rate_limit, burst=max_in_flight)
+        self.max_in_flight = max_in_flight
+        self._semaphore = None #created within the running loop
+
+        headers = {'Accept': 'application/json'}
+        if token is not None: #preferring token over basic auth
+            headers['Authorization'] = 'Token ' + token
+        connect, read = timeout if isinstance(timeout, (tuple, list)) else (timeout, timeout)
+        self.session = httpx.AsyncClient(
+            headers=headers, auth=tuple(auth) if token is None and auth else None,
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+        )
+
+    def close(self):
+        raise TypeError('use await client.aclose()')
+
+    async def aclose(self):
+        await self.session.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def request(self, method, url, **kwargs):
+        if self._semaphore is None:
+            self._semaphore = asyncio.BoundedSemaphore(self.max_in_flight)
+        async with self._semaphore:
+            return await self._request(method, self.base_url + url, **kwargs)
+
+    async def _request(self, method, url, **kwargs):
+        httpx = self.httpx
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                delay = self.limiter.reserve()
+                if delay:
+                    await asyncio.sleep(delay)
+            delay = None
+            try:
+                response = await self.session.request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                # never reached the server
+                delay = self._backoff(attempt, method, url, e, reached=False)
+                if delay is None:
+                    raise
+            except httpx.TransportError as e: #timeouts and dropped connections
+                delay = self._backoff(attempt, method, url, e, reached=True)
+                if delay is None:
+                    raise
+            else:
+                # 429: rejected before processing, so even a POST can be repeated
+                if response.status_code in RETRY_STATUS:
+                    delay = self._backoff(attempt, method, url, response.status_code,
+                                          response.status_code != 429, response)
+                if delay is None:
+                    try:
+                        response.raise_for_status()
+                    except httpx.HTTPStatusError as e:
+                        raise httpx.HTTPStatusError(error_message(e, response.text), request=e.request,
+                                                    response=response) from None
+                    return response.json() if response.content else None
+            await asyncio.sleep(delay)
+            attempt += 1
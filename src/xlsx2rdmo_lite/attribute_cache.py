@@ -0,0 +1,137 @@
+import json
+import sqlite3
+
+from .keys import truncation
+
+# Registry of the question attributes shared between catalogs, in a sqlite
+# file, so it can be used by imports in several processes at once and kept
+# across runs. For every attribute (by its path) it records, per catalog,
+# the names its key was derived from (section, questionset, frage_de) and
+# the id of the attribute on the server. A question of another catalog,
+# whose different names end up as the same (truncated) key, would silently
+# take over the attribute and the question of the first catalog; those
+# collisions are reported before anything is sent. Rows of attributes,
+# which are gone from the server, are dropped; unchanged rows aren't
+# written again.
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS attributes (
+    server TEXT NOT NULL,
+    path TEXT NOT NULL,
+    catalog TEXT NOT NULL,
+    names TEXT NOT NULL,
+    id INTEGER,
+    PRIMARY KEY (server, path, catalog)
+)
+'''
+
+
+def normalize(names):
+    # names, which only differ in case and whitespace, give the same key
+    return tuple(' '.join(str(name).split()).casefold() for name in names)
+
+def shared_attributes(model, path=None):
+    # yields (path, attribute path, catalog uri_path, names) for the questions
+    # of a model; pages are named like their sections
+    for catalog in model.catalogs.values():
+        for section in catalog.sections:
+            for page in model.sections[section].pages:
+                page = model.pages[page]
+                for questionset in page.questionsets:
+                    questionset = model.questionsets[questionset]
+                    for question in questionset.questions:
+                        question = model.questions[question]
+                        yield (path, question.attribute, catalog.uri_path,
+                               (page.title, questionset.title, question.text_de))
+
+
+def check_entries(entries, report, names_of=None):
+    # adds an error for every question, whose attribute another catalog (in
+    # names_of, as recorded: attribute path -> {catalog: names}) or another
+    # workbook of the import uses with other names; without a cache only the
+    # workbooks are compared, Model.merge would silently keep the first
+    names_of = {} if names_of is None else names_of
+    used = {} #attribute path -> {(path, catalog): names} of the import
+    for path, attribute_path, catalog, names in entries:
+        used.setdefault(attribute_path, {}).setdefault((path, catalog), names)
+    for attribute_path, sources in used.items():
+        for (path, catalog), names in sources.items():
+            names_of.setdefault(attribute_path, {})[catalog] = names #the sheets replace what was recorded
+    for path, attribute_path, catalog, names in entries:
+        others = [(other, other_names) for other, other_names in names_of[attribute_path].items() if other != catalog]
+        others.extend((other, other_names) for (other_path, other), other_names in used[attribute_path].items()
+                      if other_path != path)
+        for other_catalog, other_names in others:
+            if normalize(other_names) != normalize(names):
+                report.add(str(path), None, 'frage_de', 'question {!r} collides with {!r} of {}: both get the '
+                           'attribute key {!r} after slugifying{}'.format(
+                               names[-1], other_names[-1], other_catalog,
+                               attribute_path.rsplit('/', 1)[-1], truncation('question', names),
+                           ))
+                break
+    return report
+
+
+class AttributeCache:
+    def __init__(self, path, server):
+        self.path = path
+        self.server = ' '.join(server)
+
+    def _connect(self):
+        # waits for other processes writing at the same time
+        connection = sqlite3.connect(self.path, timeout=60)
+        connection.execute(SCHEMA)
+        return connection
+
+    def _recorded(self, connection):
+        # (attribute path, catalog) -> (names as json, id)
+        return {
+            (attribute, catalog): (names, attribute_id)
+            for attribute, catalog, names, attribute_id in connection.execute(
+                'SELECT path, catalog, names, id FROM attributes WHERE server = ?', (self.server,))
+        }
+
+    def check(self, entries, state, report):
+        # entries: of shared_attributes(), of all workbooks of the import;
+        # adds an error for every attribute, which another catalog uses with
+        # other names (as recorded or in entries)
+        connection = self._connect()
+        try:
+            recorded = self._recorded(connection)
+        finally:
+            connection.close()
+        names_of = {} #attribute path -> {catalog: names}
+        for (attribute_path, catalog), (names, attribute_id) in recorded.items():
+            attribute = state.get('attribute', attribute_path)
+            if attribute is not None and attribute['id'] == attribute_id:
+                names_of.setdefault(attribute_path, {})[catalog] = tuple(json.loads(names))
+        return check_entries(entries, report, names_of)
+
+    def record(self, entries, state):
+        # after an import: the entries with the ids of their attributes; rows
+        # of attributes deleted or re-created on the server are dropped
+        connection = self._connect()
+        try:
+            with connection:
+                recorded = self._recorded(connection)
+                stale = []
+                for (attribute_path, catalog), (names, attribute_id) in recorded.items():
+                    attribute = state.get('attribute', attribute_path)
+                    if attribute is None or attribute['id'] != attribute_id:
+                        stale.append((self.server, attribute_path, catalog))
+                connection.executemany('DELETE FROM attributes WHERE server = ? AND path = ? AND catalog = ?', stale)
+                rows = {}
+                for path, attribute_path, catalog, names in entries:
+                    attribute = state.get('attribute', attribute_path)
+                    if attribute is None:
+                        continue
+                    row = (json.dumps(names, ensure_ascii=False), attribute['id'])
+                    if recorded.get((attribute_path, catalog)) != row:
+                        rows[(attribute_path, catalog)] = row
+                connection.executemany(
+                    'INSERT OR REPLACE INTO attributes (server, path, catalog, names, id) VALUES (?, ?, ?, ?, ?)',
+                    [(self.server, attribute_path, catalog) + row for (attribute_path, catalog), row in rows.items()]
+                )
+        finally:
+            connection.close()
+        return len(rows)
@@ -0,0 +1,196 @@
+import argparse
+import os
+import sys
+
+# Command line (xlsx2rdmo, or python -m xlsx2rdmo_lite) with a subcommand per
+# phase of the importer. Importing the package loads the importer itself
+# (planning, executors, caches), but the http client (requests) is only
+# imported to connect to an instance, so validate never loads it.
+
+COMMANDS = ('validate', 'plan', 'import', 'delete', 'export', 'xml')
+
+
+def _server_options():
+    # BASE_URL, authentication and the connection
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('base_url', help='URL of the RDMO instance')
+    parser.add_argument('--token', default=os.environ.get('RDMO_TOKEN'),
+                        help='API token of an admin user (default: $RDMO_TOKEN)')
+    parser.add_argument('--user', help='basic auth user, if no token is given')
+    parser.add_argument('--password', default=os.environ.get('RDMO_PASSWORD'),
+                        help='basic auth password (default: $RDMO_PASSWORD)')
+    parser.add_argument('--uri-prefix', help='uri_prefix of the elements (default: BASE_URL/instance)')
+    parser.add_argument('--timeout', type=float, default=60,
+                        help='seconds to wait for a response (default: 60)')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='retries of a failed request (default: 3)')
+    parser.add_argument('--rate-limit', type=float, default=None,
+                        help='maximum requests per second (default: unlimited)')
+    parser.add_argument('--cache-dir',
+                        help='keep the snapshot of the server in this directory between runs')
+    parser.add_argument('--cache-max-age', type=int, default=3600,
+                        help='seconds a cached snapshot is used (default: 3600)')
+    parser.add_argument('--fake', action='store_true',
+                        help='use an empty in-memory instance instead of BASE_URL, e.g. for timing')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='with --fake: simulated seconds per request (default: 0)')
+    return parser
+
+def _run_options():
+    # how a plan is executed and what is reported
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='parallel requests (default: 1)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='execute the plan against an in-memory copy of the instance, write nothing')
+    parser.add_argument('--progress', action='store_true',
+                        help='show a progress bar (requires tqdm)')
+    return parser
+
+def _output_options():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--report', metavar='FILE',
+                        help='write timings and request counts per phase as json')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='write a cProfile dump of the run')
+    parser.add_argument('--quiet', action='store_true',
+                        help='only log warnings and errors')
+    parser.add_argument('--debug', action='store_true',
+                        help='log every request and response')
+    return parser
+
+def _sheet_options():
+    # the workbooks and how they are planned
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('paths', nargs='+', help='spreadsheets (xlsx, ods or csv), one catalog each')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes reading the workbooks (default: number of CPUs)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only import rows changed since the last incremental import (see <file>.rdmo.json)')
+    parser.add_argument('--prune', action='store_true',
+                        help='with --incremental: remove the questions of rows deleted from the sheet')
+    parser.add_argument('--attribute-cache', metavar='FILE',
+                        help='sqlite file of the attributes used by each catalog, to report questions of '
+                             'different catalogs colliding on the same key (default: CACHE_DIR/attributes.sqlite)')
+    return parser
+
+def make_parser():
+    parser = argparse.ArgumentParser(
+        prog='xlsx2rdmo',
+        description='Import xlsx/ods/csv files of questions into RDMO, one catalog per file. '
+                    'Without a command, the arguments are those of import.'
+    )
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    server, run, output, sheet = _server_options(), _run_options(), _output_options(), _sheet_options()
+
+    validate = commands.add_parser('validate', help='check spreadsheets without contacting RDMO')
+    validate.add_argument('paths', nargs='+', help='spreadsheets (xlsx, ods or csv)')
+
+    commands.add_parser('plan', parents=[server, sheet, output],
+                        help='print the operations an import would send, write nothing')
+
+    import_ = commands.add_parser('import', parents=[server, sheet, run, output], help='import spreadsheets')
+    import_.add_argument('--resume', action='store_true',
+                         help='continue an import, which failed or was killed, from its journal '
+                              '(<file>.rdmo-journal.jsonl)')
+    import_.add_argument('--no-journal', action='store_true',
+                         help='do not keep a journal of the progress of the import')
+
+    delete = commands.add_parser('delete', parents=[server, run, output],
+                                 help='delete a catalog (and what only it uses) or everything')
+    target = delete.add_mutually_exclusive_group(required=True)
+    target.add_argument('--catalog', help='uri_path or title of the catalog')
+    target.add_argument('--all', action='store_true', help='delete all elements of the instance')
+    delete.add_argument('--yes', action='store_true', help='with --all: do not ask for confirmation')
+
+    export = commands.add_parser('export', parents=[server, output],
+                                 help='write a catalog of the instance as spreadsheet')
+    export.add_argument('catalog', help='uri_path or title of the catalog')
+    export.add_argument('out', help='spreadsheet to write (xlsx or csv)')
+
+    xml = commands.add_parser('xml', parents=[output], help='write a spreadsheet as RDMO xml, without contacting RDMO')
+    xml.add_argument('path', help='spreadsheet (xlsx, ods or csv)')
+    xml.add_argument('out', help='xml file to write')
+    xml.add_argument('--uri-prefix', required=True, help='uri_prefix of the elements')
+    return parser
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] not in COMMANDS and argv[0] not in ('-h', '--help'):
+        argv.insert(0, 'import') #xlsx2rdmo BASE_URL PATHS... as before the subcommands
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.error('a command is required')
+
+    if args.command == 'validate':
+        from .validate import validate
+        errors = 0
+        for path in args.paths:
+            report = validate(path)
+            if len(report):
+                print(report)
+            errors += len(report.errors)
+        print('{} error(s)'.format(errors), file=sys.stderr)
+        return 1 if errors else 0
+
+    if args.command != 'xml' and not args.token and not args.user and not args.fake:
+        parser.error('either --token (or $RDMO_TOKEN) or --user is required')
+    if args.command != 'xml' and not args.token and args.user and args.password is None and not args.fake:
+        if not sys.stdin.isatty():
+            parser.error('--user requires --password (or $RDMO_PASSWORD) when not run interactively')
+        import getpass
+        args.password = getpass.getpass('password of {}: '.format(args.user))
+    if args.command == 'delete' and args.all and not args.yes:
+        if not sys.stdin.isatty():
+            parser.error('delete --all requires --yes when not run interactively')
+        answer = input('delete all elements of {}? [y/N] '.format(args.base_url))
+        if answer.strip().lower() not in ('y', 'yes'):
+            print('nothing deleted', file=sys.stderr)
+            return 1
+
+    from . import xlsx2rdmo_lite
+
+    # nothing of a fake run may end up in the cache or the manifests
+    fake = getattr(args, 'fake', False)
+    importer = xlsx2rdmo_lite(
+        debug=args.debug, concurrency=getattr(args, 'concurrency', 1),
+        cache_dir=None if fake else getattr(args, 'cache_dir', None),
+        cache_max_age=getattr(args, 'cache_max_age', 3600),
+        report_path=args.report, profile=args.profile,
+        verbose=not args.quiet, progress=getattr(args, 'progress', False),
+        dry_run=getattr(args, 'dry_run', False) or fake,
+        journal=not getattr(args, 'no_journal', False),
+        attribute_cache=None if fake else getattr(args, 'attribute_cache', None)
+    )
+    from .validate import ValidationError
+    if args.command == 'xml':
+        try:
+            importer.export_xml(args.path, args.out, args.uri_prefix)
+        except ValidationError as e:
+            print('error: {}'.format(e.args[0]), file=sys.stderr)
+            return 1
+        return 0
+
+    from .fake import FakeRDMO
+    auth = (args.user, args.password) if args.user else None
+    importer.init_rdmo_access(
+        args.base_url, auth=auth, token=args.token, uri_prefix=args.uri_prefix,
+        timeout=(5, args.timeout), retries=args.retries, rate_limit=args.rate_limit,
+        client=FakeRDMO(latency=args.latency) if fake else None
+    )
+    try:
+        if args.command == 'plan':
+            for op in importer.plan_many(args.paths, args.processes, args.incremental, args.prune):
+                print(op)
+        elif args.command == 'import':
+            importer.import_many(args.paths, args.processes, args.incremental, args.prune, args.resume)
+        elif args.command == 'delete':
+            importer.delete(None if args.all else args.catalog)
+        elif args.command == 'export':
+            importer.export_xlsx(args.catalog, args.out)
+    except (ValidationError, KeyError) as e: #invalid sheet, unknown catalog
+        print('error: {}'.format(e.args[0]), file=sys.stderr)
+        return 1
+    return 0
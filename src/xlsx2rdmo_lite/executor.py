@@ -0,0 +1,110 @@
+import asyncio
+import heapq
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .plan import Ref, apply_operation, apply_operation_async
+
+
+def dependencies(operations):
+    # index of the operations every operation has to wait for: the create or
+    # update of each element it references (attribute parent -> attribute ->
+    # question -> questionset with its members, ...)
+    producers = {}
+    deps = []
+    for i, op in enumerate(operations):
+        deps.append({producers[ref] for ref in op.refs() if ref in producers})
+        producers[Ref(op.kind, op.ref)] = i
+    return deps
+
+def schedule(operations):
+    # the operations waiting for each operation, the number of operations
+    # each one waits for, and a heap of those ready to run
+    deps = dependencies(operations)
+    dependents = [[] for _ in operations]
+    for i, required in enumerate(deps):
+        for j in required:
+            dependents[j].append(i)
+    waiting = [len(required) for required in deps]
+    ready = [i for i, n in enumerate(waiting) if n == 0] #heap: keep plan order where possible
+    return dependents, waiting, ready
+
+
+class Executor:
+    # runs the operations of a plan against the client; with concurrency > 1
+    # independent operations are sent in parallel on a bounded thread pool,
+    # while each operation still waits for the elements it depends on
+    def __init__(self, client, state, concurrency=1, on_done=None, on_start=None):
+        self.client = client
+        self.state = state
+        self.concurrency = max(1, int(concurrency))
+        self.on_done = on_done
+        self.on_start = on_start
+
+    def run(self, operations):
+        operations = list(operations)
+        if self.concurrency == 1:
+            # plans are ordered, so dependencies are always met
+            for op in operations:
+                self._start(op)
+                self._done(op, apply_operation(self.client, self.state, op))
+            return
+
+        dependents, waiting, ready = schedule(operations)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while ready or running:
+                while ready and len(running) < self.concurrency:
+                    i = heapq.heappop(ready)
+                    self._start(operations[i])
+                    running[pool.submit(apply_operation, self.client, self.state, operations[i])] = i
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = running.pop(future)
+                    try:
+                        obj = future.result()
+                    except Exception:
+                        for other in running: #let running requests finish, start nothing new
+                            other.cancel()
+                        raise
+                    self._done(operations[i], obj)
+                    for j in dependents[i]:
+                        waiting[j] -= 1
+                        if waiting[j] == 0:
+                            heapq.heappush(ready, j)
+
+    def _start(self, op):
+        if self.on_start is not None:
+            self.on_start(op)
+
+    def _done(self, op, obj):
+        if self.on_done is not None:
+            self.on_done(op, obj)
+
+
+class AsyncExecutor(Executor):
+    # the same on an asyncio event loop: the operations are tasks instead of
+    # threads, at most concurrency of them in flight; run() is a coroutine
+    # and the client's methods have to be coroutines as well
+    async def run(self, operations):
+        operations = list(operations)
+        dependents, waiting, ready = schedule(operations)
+        running = {}
+        try:
+            while ready or running:
+                while ready and len(running) < self.concurrency:
+                    i = heapq.heappop(ready)
+                    self._start(operations[i])
+                    task = asyncio.ensure_future(apply_operation_async(self.client, self.state, operations[i]))
+                    running[task] = i
+                finished, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    i = running.pop(task)
+                    self._done(operations[i], task.result())
+                    for j in dependents[i]:
+                        waiting[j] -= 1
+                        if waiting[j] == 0:
+                            heapq.heappush(ready, j)
+        except Exception:
+            # let running requests finish, start nothing new
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
@@ -0,0 +1,221 @@
+import asyncio
+import copy
+import itertools
+import json
+import random
+import threading
+import time
+
+from .plan import APPS, PLURALS
+
+# In-memory stand-in for an RDMO instance with the methods of the client
+# (list_*, create_*, update_*, destroy_*), for dry runs, tests and
+# benchmarks without a network. Like RDMO it rejects duplicate uri_paths
+# (attributes: paths) per uri_prefix, references to unknown elements and
+# unknown ids with an HTTPError, deletes child attributes along with their
+# parent, and drops the memberships of deleted elements. Every request can
+# be delayed by a simulated latency.
+
+# kind -> {field: kind of the referenced element(s)}, a single id or a list
+REFERENCES = {
+    'attribute': {'parent': 'attribute'},
+    'page': {'attribute': 'attribute'},
+    'questionset': {'attribute': 'attribute'},
+    'question': {'attribute': 'attribute', 'optionsets': 'optionset'},
+}
+
+# kind -> {membership field: kind of the members}
+MEMBERSHIPS = {
+    'catalog': {'sections': 'section'},
+    'section': {'pages': 'page'},
+    'page': {'questionsets': 'questionset', 'questions': 'question'},
+    'questionset': {'questionsets': 'questionset', 'questions': 'question'},
+    'optionset': {'options': 'option'},
+}
+
+
+def _error(status, detail):
+    import requests #only needed once something fails
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(detail).encode('utf-8')
+    response.headers['Content-Type'] = 'application/json'
+    return requests.HTTPError('{} Client Error: {}'.format(status, detail), response=response)
+
+
+class FakeRDMO:
+    def __init__(self, latency=0, page_size=None, seed=None):
+        # latency: seconds per request, or (min, max) for a random delay
+        # page_size: paginate the lists like RDMO's api does, or None
+        self.latency = latency
+        self.page_size = page_size
+        self.random = random.Random(seed)
+        self.elements = {kind: {} for kind in PLURALS} #kind -> id -> element
+        self.unique = {kind: {} for kind in PLURALS} #kind -> (uri_prefix, uri_path or path) -> id
+        self.ids = itertools.count(1)
+        self.requests = [] #(verb, kind) of every request
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_snapshot(cls, snapshot, **kwargs):
+        # a copy of the elements of a Snapshot, e.g. of the real instance
+        fake = cls(**kwargs)
+        top = 0
+        for kind in PLURALS:
+            for element in snapshot.elements(kind):
+                element = copy.deepcopy(element)
+                fake.elements[kind][element['id']] = element
+                fake.unique[kind][fake._identity(kind, element)] = element['id']
+                top = max(top, element['id'])
+        fake.ids = itertools.count(top + 1)
+        return fake
+
+    def __getattr__(self, name):
+        action, _, kind = name.partition('_')
+        if action == 'list':
+            kind = next((k for k, plural in PLURALS.items() if plural == kind), None)
+        if kind not in PLURALS or action not in ('list', 'create', 'update', 'destroy'):
+            raise AttributeError(name)
+        method = getattr(self, '_' + action)
+        return lambda *args, **kwargs: self._request(action, kind, method, *args, **kwargs)
+
+    def _request(self, action, kind, method, *args, **kwargs):
+        # delayed outside of the lock, so parallel requests overlap like on a server
+        latency = self._latency()
+        if latency:
+            time.sleep(latency)
+        return self._handle(action, kind, method, *args, **kwargs)
+
+    def _handle(self, action, kind, method, *args, **kwargs):
+        with self.lock:
+            self.requests.append((action, kind))
+            return copy.deepcopy(method(kind, *args, **kwargs))
+
+    def _latency(self):
+        latency = self.latency
+        if isinstance(latency, (tuple, list)):
+            latency = self.random.uniform(*latency)
+        return latency
+
+    def _list(self, kind, page=None, **filters):
+        results = [
+            element for element in self.elements[kind].values()
+            if all(element.get(field) == value for field, value in filters.items())
+        ]
+        if self.page_size is None:
+            return results
+        page = int(page or 1)
+        start = (page - 1) * self.page_size
+        return {
+            'count': len(results),
+            'next': 'page={}'.format(page + 1) if start + self.page_size < len(results) else None,
+            'previous': 'page={}'.format(page - 1) if page > 1 else None,
+            'results': results[start:start + self.page_size],
+        }
+
+    def _create(self, kind, data):
+        element = copy.deepcopy(data)
+        element['id'] = next(self.ids)
+        return self._save(kind, element)
+
+    def _update(self, kind, pk, data):
+        self._get(kind, pk)
+        element = copy.deepcopy(data)
+        element['id'] = pk
+        return self._save(kind, element)
+
+    def _destroy(self, kind, pk):
+        self._get(kind, pk)
+        removed = [pk]
+        if kind == 'attribute':
+            # descendants are deleted as well
+            for element_id in removed:
+                removed.extend(
+                    other['id'] for other in self.elements['attribute'].values()
+                    if other.get('parent') == element_id
+                )
+        for element_id in removed:
+            element = self.elements[kind].pop(element_id)
+            self.unique[kind].pop(self._identity(kind, element), None)
+            self._unlink(kind, element_id)
+        return None
+
+    def _get(self, kind, pk):
+        if pk not in self.elements[kind]:
+            raise _error(404, {'detail': 'Not found.'})
+        return self.elements[kind][pk]
+
+    def _save(self, kind, element):
+        for field, ref_kind in REFERENCES.get(kind, {}).items():
+            value = element.get(field)
+            for ref in value if isinstance(value, list) else [value]:
+                if ref is not None and ref not in self.elements[ref_kind]:
+                    raise _error(400, {field: ['Invalid pk "{}" - object does not exist.'.format(ref)]})
+        for field, member_kind in MEMBERSHIPS.get(kind, {}).items():
+            element.setdefault(field, [])
+            for f in element[field]:
+                if f.get(member_kind) not in self.elements[member_kind]:
+                    raise _error(400, {field: ['Invalid pk "{}" - object does not exist.'.format(f.get(member_kind))]})
+
+        if kind == 'attribute':
+            if not element.get('key'):
+                raise _error(400, {'key': ['This field is required.']})
+            parent = self.elements['attribute'].get(element.get('parent'))
+            element['path'] = (parent['path'] + '/' if parent else '') + str(element['key'])
+        elif not element.get('uri_path'):
+            raise _error(400, {'uri_path': ['This field is required.']})
+        identity = self._identity(kind, element)
+        if self.unique[kind].get(identity, element['id']) != element['id']:
+            raise _error(400, {'uri': ['{} with the uri {}/{} already exists.'.format(kind, *identity)]})
+
+        old = self.elements[kind].get(element['id'])
+        if old is not None:
+            self.unique[kind].pop(self._identity(kind, old), None)
+        self.unique[kind][identity] = element['id']
+        element['uri'] = '{}/{}/{}'.format(element.get('uri_prefix'), APPS[kind], identity[1])
+        self.elements[kind][element['id']] = element
+        if kind == 'attribute' and old is not None and old.get('path') != element['path']:
+            self._move_children(element)
+        return element
+
+    def _identity(self, kind, element):
+        return (element.get('uri_prefix'), element.get('path' if kind == 'attribute' else 'uri_path'))
+
+    def _move_children(self, attribute):
+        # the paths of the descendants follow their parent
+        for child in list(self.elements['attribute'].values()):
+            if child.get('parent') == attribute['id']:
+                self.unique['attribute'].pop(self._identity('attribute', child), None)
+                child['path'] = attribute['path'] + '/' + str(child.get('key'))
+                child['uri'] = '{}/{}/{}'.format(child.get('uri_prefix'), APPS['attribute'], child['path'])
+                self.unique['attribute'][self._identity('attribute', child)] = child['id']
+                self._move_children(child)
+
+    def _unlink(self, kind, element_id):
+        # memberships and references of a deleted element are removed
+        for container_kind, fields in MEMBERSHIPS.items():
+            for field, member_kind in fields.items():
+                if member_kind != kind:
+                    continue
+                for container in self.elements[container_kind].values():
+                    if any(f[member_kind] == element_id for f in container.get(field, [])):
+                        container[field] = [f for f in container[field] if f[member_kind] != element_id]
+        for other_kind, fields in REFERENCES.items():
+            for field, ref_kind in fields.items():
+                if ref_kind != kind or other_kind == 'attribute':
+                    continue
+                for element in self.elements[other_kind].values():
+                    if isinstance(element.get(field), list):
+                        element[field] = [ref for ref in element[field] if ref != element_id]
+                    elif element.get(field) == element_id:
+                        element[field] = None
+
+
+class AsyncFakeRDMO(FakeRDMO):
+    # the same instance with coroutine methods, for the async import; the
+    # latency is awaited, so requests overlap without a thread each
+    async def _request(self, action, kind, method, *args, **kwargs):
+        latency = self._latency()
+        if latency:
+            await asyncio.sleep(latency)
+        return self._handle(action, kind, method, *args, **kwargs)
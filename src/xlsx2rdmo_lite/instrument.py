@@ -0,0 +1,152 @@
+import cProfile
+import heapq
+import inspect
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Instrumentation of an import: wall time per phase (read, snapshot, plan,
+# execute, ...) with its requests by verb and endpoint, the requests sent to
+# RDMO by verb and endpoint with their time (and json body sizes, for a
+# report file), and the slowest requests. The report is a plain
+# dict (or json file) to compare runs across versions; optionally the run is
+# profiled with cProfile as well.
+
+VERBS = {'list': 'GET', 'create': 'POST', 'update': 'PUT', 'destroy': 'DELETE'}
+SLOWEST = 10
+
+
+def _size(obj):
+    return 0 if obj is None else len(json.dumps(obj, default=str))
+
+
+class Metrics:
+    def __init__(self, profile=None, sizes=False):
+        self.profile = profile #path of the cProfile dump, or None
+        # sizes: serialize every body to count its bytes, only done for a
+        # report written to a file, it costs time in the request loop
+        self.sizes = sizes
+        self.phases = {}
+        self.calls = {}
+        self.slowest = [] #heap of (seconds, n, call)
+        self._n = itertools.count()
+        self.phase_name = None
+        self.started = None
+        self.total = 0.0
+        self.lock = threading.Lock()
+        self._profiler = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile)
+            self._profiler = None
+        self.total = time.perf_counter() - self.started
+
+    @contextmanager
+    def phase(self, name):
+        # phases of the same name add up, e.g. reading several workbooks
+        outer, self.phase_name = self.phase_name, name
+        stats = self.phases.setdefault(name, {'seconds': 0.0, 'requests': 0, 'calls': {}})
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats['seconds'] += time.perf_counter() - start
+            self.phase_name = outer
+
+    def wrap(self, client):
+        return InstrumentedClient(client, self)
+
+    def record(self, verb, endpoint, seconds, sent, received):
+        # called from the executor's threads as well
+        call = verb + ' ' + endpoint
+        with self.lock:
+            stats = self.calls.get(call)
+            if stats is None:
+                stats = self.calls[call] = {'count': 0, 'seconds': 0.0}
+                if self.sizes:
+                    stats.update(sent=0, received=0)
+            stats['count'] += 1
+            stats['seconds'] += seconds
+            if self.sizes:
+                stats['sent'] += sent
+                stats['received'] += received
+            if self.phase_name is not None:
+                phase = self.phases[self.phase_name]
+                phase['requests'] += 1
+                stats = phase['calls'].setdefault(call, {'count': 0, 'seconds': 0.0})
+                stats['count'] += 1
+                stats['seconds'] += seconds
+            entry = (seconds, next(self._n), {
+                'call': call, 'phase': self.phase_name, 'seconds': seconds,
+            })
+            if len(self.slowest) < SLOWEST:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heappushpop(self.slowest, entry)
+
+    def report(self):
+        requests = {'count': sum(s['count'] for s in self.calls.values())}
+        if self.sizes:
+            requests['sent'] = sum(s['sent'] for s in self.calls.values())
+            requests['received'] = sum(s['received'] for s in self.calls.values())
+        requests['calls'] = self.calls
+        return {
+            'seconds': self.total,
+            'phases': self.phases,
+            'requests': requests,
+            'slowest': [entry[2] for entry in sorted(self.slowest, key=lambda entry: -entry[0])],
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=1)
+
+
+class InstrumentedClient:
+    # times the list_*, create_*, update_* and destroy_* calls of a client;
+    # sizes (if measured) are those of the json bodies (sent data, received
+    # elements)
+    def __init__(self, client, metrics):
+        self.client = client
+        self.metrics = metrics
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+        action, _, endpoint = name.partition('_')
+        if action not in VERBS:
+            return method
+        if action != 'list':
+            endpoint += 's'
+
+        def record(start, args, result):
+            seconds = time.perf_counter() - start
+            if not self.metrics.sizes:
+                self.metrics.record(VERBS[action], endpoint, seconds, 0, 0)
+                return
+            data = args[-1] if action in ('create', 'update') else None
+            self.metrics.record(VERBS[action], endpoint, seconds, _size(data), _size(result))
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            if inspect.isawaitable(result): #async client, timed until the response
+                return awaited(start, args, result)
+            record(start, args, result)
+            return result
+
+        async def awaited(start, args, result):
+            result = await result
+            record(start, args, result)
+            return result
+        return call
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+
+from .plan import PLURALS
+from .snapshot import KEYS, Snapshot, project
+
+# Append-only progress journal of an import (<workbook>.rdmo-journal.jsonl).
+# The first lines hold the run (server, workbooks) and the snapshot the plan
+# was made from; then every operation is logged when it starts and, with the
+# element the server returned, when it's done. The journal is removed after
+# a successful import. After a crash or a timeout, a resumed import rebuilds
+# the state of the server from the journal instead of listing it again, and
+# only asks the server about the operations, which were started but never
+# finished; the new plan then continues where the last run stopped. If the
+# directory of the workbook is read-only, the journal is kept in the
+# cache_dir instead, or the import runs without one.
+
+VERSION = 2
+
+
+def journal_path(xlsx_path, cache_dir=None):
+    # next to the workbook, else in the cache_dir (named after the workbook's
+    # full path), else None
+    path = str(xlsx_path) + '.rdmo-journal.jsonl'
+    if os.access(os.path.dirname(os.path.abspath(path)), os.W_OK):
+        return path
+    if cache_dir is None:
+        return None
+    name = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, 'journal-' + name + '.jsonl')
+
+
+class Journal:
+    def __init__(self, path, server, paths):
+        self.path = path
+        self.server = list(server)
+        self.paths = [str(p) for p in paths]
+        self.file = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def start(self, state):
+        # a new journal for a run planned from state
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self._write({'version': VERSION, 'server': self.server, 'paths': self.paths})
+        self._write({'snapshot': {kind: list(state.indexes[kind]) for kind in PLURALS}})
+
+    def started(self, op):
+        self._write({'start': [op.action, op.kind, op.ref], 'id': op.data.get('id')})
+
+    def done(self, op, obj):
+        self._write({'done': [op.action, op.kind, op.ref], 'id': op.data.get('id'), 'obj': obj})
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        self.close()
+        if self.exists():
+            os.remove(self.path)
+
+    def _write(self, entry):
+        # one line per entry, flushed at once, so a killed run leaves at most
+        # a partial last line
+        self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def load(self, client):
+        # the state at the end of the journaled run, or None, if there is no
+        # usable journal of this run
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                lines = f.read().split('\n')
+        except FileNotFoundError:
+            return None
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break #partial last line
+        if len(entries) < 2 or entries[0] != {'version': VERSION, 'server': self.server, 'paths': self.paths}:
+            return None
+
+        uri_prefix = self.server[1]
+        state = Snapshot(entries[1]['snapshot'], uri_prefix)
+        unfinished = {}
+        for entry in entries[2:]:
+            if 'start' in entry:
+                action, kind, ref = entry['start']
+                unfinished[(kind, ref, entry.get('id'))] = action
+            else:
+                action, kind, ref = entry['done']
+                unfinished.pop((kind, ref, entry.get('id')), None)
+                if action == 'destroy':
+                    self._remove(state, kind, ref, entry.get('id'))
+                else:
+                    state.put(kind, entry['obj'])
+        for (kind, ref, element_id), action in unfinished.items():
+            # the outcome is unknown, ask the server
+            prefix = uri_prefix
+            if element_id is not None: #destroyed by id, maybe of another uri_prefix
+                element = state.indexes[kind].get_by_id(element_id)
+                if element is None:
+                    continue
+                ref, prefix = element[KEYS[kind]], element.get('uri_prefix')
+            obj = probe(client, kind, ref, prefix)
+            if obj is None:
+                self._remove(state, kind, ref, element_id)
+            else:
+                state.put(kind, obj)
+        return state
+
+    @staticmethod
+    def _remove(state, kind, ref, element_id=None):
+        if element_id is None:
+            state.remove(kind, ref)
+        else:
+            state.indexes[kind].remove_id(element_id)
+
+
+def probe(client, kind, ref, uri_prefix):
+    # the element with the uri_path (attributes: path) ref, or None
+    key = KEYS[kind]
+    response = getattr(client, 'list_' + PLURALS[kind])(**{key: ref, 'uri_prefix': uri_prefix})
+    if isinstance(response, dict) and 'results' in response:
+        response = response['results'] #an exact filter has a single page
+    for obj in response:
+        if obj.get(key) == ref and obj.get('uri_prefix') == uri_prefix:
+            return project(kind, obj)
+    return None
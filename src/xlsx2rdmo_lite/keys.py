@@ -0,0 +1,94 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from slugify import slugify #python-slugify
+
+# The one place where keys and uri_paths are derived from the names in the
+# sheet. Slugifying (regex + unidecode) is the most expensive part of reading
+# a sheet, so every distinct name and tuple of names is only slugified once;
+# the memos are bounded to keep memory flat for huge sheets.
+
+MEMO_SIZE = 16384
+# questionset names and frage_de are cut to MAX_NAME characters after
+# slugifying, and attribute keys of questions to MAX_ATTRIBUTE_KEY, so
+# different questions can end up with the same key
+MAX_NAME = 100
+MAX_ATTRIBUTE_KEY = 110
+
+Keys = namedtuple('Keys', [
+    'catalog',
+    'section_attribute',
+    'section',
+    'page',
+    'questionset_attribute',
+    'questionset',
+    'question_attribute',
+    'question',
+])
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def slug(text, max_length=0):
+    return slugify(str(text), max_length=max_length)
+
+def catalog_key(catalog_name):
+    return 'catalog-' + slug(catalog_name)
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _section_keys(catalog_name, section_name):
+    catalog = catalog_key(catalog_name)
+    section_attribute = slug(section_name)
+    section = slug('{}_{}'.format(catalog_name, section_name))
+    # pages are identical with sections
+    page = 'page-' + section
+    return catalog, section_attribute, section, page
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _questionset_keys(catalog_name, section_name, questionset_name):
+    questionset_slug = slug(questionset_name, max_length=MAX_NAME)
+    questionset_attribute = slug('{}_{}'.format(section_name, questionset_slug))
+    questionset = slug('{}_{}_{}'.format(catalog_name, section_name, questionset_slug))
+    return _section_keys(catalog_name, section_name) + (questionset_attribute, questionset)
+
+@lru_cache(maxsize=MEMO_SIZE)
+def derive_keys(catalog_name, section_name, questionset_name, frage_de):
+    containers = _questionset_keys(catalog_name, section_name, questionset_name)
+    question_attribute = slug(
+        "{}_{}_{}".format(
+            section_name,
+            slug(questionset_name, max_length=MAX_NAME),
+            slug(frage_de, max_length=MAX_NAME)
+        )
+    )[:MAX_ATTRIBUTE_KEY]
+    return Keys(*containers, question_attribute, 'question-' + question_attribute)
+
+@lru_cache(maxsize=MEMO_SIZE)
+def optionset_key(optionset_name):
+    return 'optionset-' + slug(optionset_name, max_length=MAX_NAME)
+
+@lru_cache(maxsize=MEMO_SIZE)
+def option_key(optionset_name, text):
+    # options belong to their option set, the same text in another set is
+    # another option
+    return 'option-' + slug('{}_{}'.format(slug(optionset_name, max_length=MAX_NAME), slug(text, max_length=MAX_NAME)))
+
+def truncation(kind, names):
+    # ' and truncating ...' for messages about colliding keys: the names (as
+    # given to the checks of validate.py) cut short on the way to the key
+    cuts = []
+    if kind == 'questionset':
+        if slug(names[-1]) != slug(names[-1], max_length=MAX_NAME):
+            cuts.append('the questionset to {} characters'.format(MAX_NAME))
+    elif kind == 'question':
+        section_name, questionset_name, frage_de = names
+        for column, name in (('questionset', questionset_name), ('frage_de', frage_de)):
+            if slug(name) != slug(name, max_length=MAX_NAME):
+                cuts.append('{} to {} characters'.format(column, MAX_NAME))
+        full = slug('{}_{}_{}'.format(section_name, slug(questionset_name, max_length=MAX_NAME),
+                                      slug(frage_de, max_length=MAX_NAME)))
+        if len(full) > MAX_ATTRIBUTE_KEY:
+            cuts.append('the key to {} characters'.format(MAX_ATTRIBUTE_KEY))
+    return ' and truncating ' + ' and '.join(cuts) if cuts else ''
+
+def row_keys(row):
+    return derive_keys(row.catalog, row.section, row.questionset, row.frage_de)
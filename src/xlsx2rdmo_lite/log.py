@@ -0,0 +1,65 @@
+import logging
+from pprint import pformat
+
+# Progress and diagnostics go through the 'xlsx2rdmo_lite' logger. Messages
+# are formatted lazily by logging, so nothing is formatted while a level is
+# disabled; objects are only pretty-printed when a debug record is emitted.
+
+log = logging.getLogger('xlsx2rdmo_lite')
+log.addHandler(logging.NullHandler())
+
+
+class Pretty:
+    # log.debug('%s', Pretty(obj)) runs pformat only if the record is emitted
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        return pformat(self.obj)
+
+
+# what configure() changed, so reset() undoes only that
+_configured = {'handler': None, 'level': False}
+
+
+def configure(level=logging.INFO):
+    # plain messages on stderr, unless the application configured logging
+    # itself; called by the importer for verbose/debug output and by the cli
+    log.setLevel(level)
+    _configured['level'] = True
+    if not any(isinstance(handler, logging.StreamHandler) for handler in log.handlers) \
+            and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        log.addHandler(handler)
+        _configured['handler'] = handler
+
+def reset():
+    # undoes configure() (of an earlier verbose importer); a level or
+    # handlers the application set itself are left alone
+    if _configured['level']:
+        log.setLevel(logging.NOTSET)
+        _configured['level'] = False
+    if _configured['handler'] is not None:
+        log.removeHandler(_configured['handler'])
+        _configured['handler'] = None
+
+
+class NoProgress:
+    def update(self, n=1):
+        pass
+
+    def close(self):
+        pass
+
+
+def progress_bar(total, desc=None):
+    # tqdm is optional
+    try:
+        from tqdm.auto import tqdm
+    except ImportError:
+        log.warning('install tqdm for a progress bar')
+        return NoProgress()
+    return tqdm(total=total, desc=desc, unit='request')
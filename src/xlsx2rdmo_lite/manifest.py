@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+
+from .keys import row_keys
+from .model import build_model
+from .spreadsheet import COLUMNS, read_options, read_rows
+from .validate import Validator, check_model
+
+# Sidecar file next to the workbook (<workbook>.rdmo.json), which records the
+# content hash of every row of the last import and the ids it produced. On
+# the next incremental import only new or changed rows (and their
+# containers) are planned, and rows gone from the sheet are detected.
+
+VERSION = 1
+
+
+def manifest_path(xlsx_path):
+    return str(xlsx_path) + '.rdmo.json'
+
+def row_hash(row):
+    values = [getattr(row, name) for name in COLUMNS.values()]
+    values.append(sorted((row.extra or {}).items()))
+    return hashlib.sha1(
+        json.dumps(values, default=str, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+
+
+class Manifest:
+    def __init__(self, path, server, rows=None):
+        self.path = path
+        self.server = list(server) #[base_url, uri_prefix] the ids belong to
+        self.rows = rows or {} #question uri_path -> {'hash', 'questionset', 'question', 'attribute'}
+        self.current = None
+        self.deleted = None
+
+    @classmethod
+    def load(cls, xlsx_path, server):
+        path = manifest_path(xlsx_path)
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(path, server)
+        if data.get('version') != VERSION or data.get('server') != list(server):
+            return cls(path, server) #ids of another instance are of no use
+        return cls(path, server, data['rows'])
+
+    def verify(self, state):
+        # forgets the rows, whose question or questionset is gone from the
+        # server (e.g. the catalog was deleted), so they are planned again;
+        # returns their number
+        stale = [
+            question for question, entry in self.rows.items()
+            if (state.get('question', question) or {}).get('id') != entry.get('question')
+            or state.get('questionset', entry['questionset']) is None
+        ]
+        for question in stale:
+            del self.rows[question]
+        return len(stale)
+
+    def scan(self, rows):
+        # returns the new or changed rows and the entries of the rows, which
+        # are gone from the sheet
+        self.current = {}
+        changed = []
+        for row in rows:
+            keys = row_keys(row)
+            if keys.question in self.current: #duplicates are skipped by the model as well
+                continue
+            digest = row_hash(row)
+            entry = self.rows.get(keys.question)
+            if entry is not None and entry['hash'] == digest:
+                self.current[keys.question] = entry
+            else:
+                self.current[keys.question] = {'hash': digest, 'questionset': keys.questionset}
+                changed.append(row)
+        self.deleted = {
+            question: entry for question, entry in self.rows.items()
+            if question not in self.current
+        }
+        return changed, self.deleted
+
+    def save(self, state, pruned=False):
+        # called after the import, so the ids of all planned rows are known;
+        # deleted rows are kept (and reported again) until they are pruned
+        rows = {} if pruned else dict(self.deleted)
+        for question, entry in self.current.items():
+            entry = dict(entry)
+            obj = state.get('question', question)
+            if obj is not None:
+                entry['question'] = obj['id']
+                entry['attribute'] = obj.get('attribute')
+            rows[question] = entry
+        data = {'version': VERSION, 'server': self.server, 'rows': rows}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+        self.rows = rows
+
+
+def load_changes(xlsx_path, manifest):
+    # top-level, so it can run in worker processes; returns the model of the
+    # changed rows, the scanned manifest, the deleted rows and the report of
+    # the validation of the changed rows
+    # the options sheet is small and always planned in full, unchanged rows
+    # may list the options of the sets the changed rows use
+    validator = Validator(xlsx_path, complete=False)
+    try:
+        changed, deleted = manifest.scan(read_rows(xlsx_path))
+    except ValueError: #missing columns, reported like for a full import
+        model, report = check_model(xlsx_path)
+        return model, manifest, {}, report
+    model = build_model(validator.check(changed), validator.check_options(read_options(xlsx_path)))
+    return model, manifest, deleted, validator.report
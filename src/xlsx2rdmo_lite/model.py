@@ -0,0 +1,234 @@
+import re
+from dataclasses import dataclass, field, fields, replace
+from typing import Dict, List, Optional, Tuple
+
+from .keys import option_key, optionset_key, row_keys
+
+# Desired RDMO state, built from the spreadsheet before any request is sent.
+# Every element is identified by its uri_path (attributes by their path, the
+# keys of their ancestors and their own key joined by '/'), the same way the
+# importer finds them on the server. Option sets are identified
+# by their name, so a set used by thousands of questions is one element.
+
+# widget type -> value type of the answers, unless the valuetype column
+# says otherwise
+WIDGET_TYPES = {
+    'text': 'text',
+    'textarea': 'text',
+    'yesno': 'boolean',
+    'checkbox': 'option',
+    'radio': 'option',
+    'select': 'option',
+    'autocomplete': 'option',
+    'range': 'float',
+    'date': 'datetime',
+    'file': 'file',
+}
+# widget types, which need an option set
+OPTION_WIDGETS = ('checkbox', 'radio', 'select', 'autocomplete')
+VALUE_TYPES = ('text', 'url', 'integer', 'float', 'boolean', 'datetime', 'option', 'email', 'phone', 'file')
+
+# options in the options column: one per line or separated by ';', each
+# 'text_de' or 'text_de | text_en'
+_OPTION_SEPARATOR = re.compile(r'[;\n]')
+
+
+def slotted(cls):
+    # the dataclass with __slots__ instead of a __dict__ per instance (like
+    # dataclass(slots=True) of python 3.10), for the elements planned by the
+    # hundred thousand
+    names = tuple(f.name for f in fields(cls))
+    namespace = {k: v for k, v in cls.__dict__.items() if k not in names + ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@slotted
+@dataclass
+class Attribute:
+    path: str
+    key: str
+    parent: Optional[str] = None #path of the parent attribute
+
+@slotted
+@dataclass
+class Catalog:
+    uri_path: str
+    title: str
+    sections: List[str] = field(default_factory=list)
+
+@slotted
+@dataclass
+class Section:
+    uri_path: str
+    title: str
+    pages: List[str] = field(default_factory=list)
+
+@slotted
+@dataclass
+class Page:
+    uri_path: str
+    title: str
+    questionsets: List[str] = field(default_factory=list)
+
+@slotted
+@dataclass
+class QuestionSet:
+    uri_path: str
+    title: str
+    questions: List[str] = field(default_factory=list)
+
+@slotted
+@dataclass
+class OptionSet:
+    uri_path: str
+    name: str #name in the sheet, option sets have no title in RDMO
+    options: List[str] = field(default_factory=list)
+
+@slotted
+@dataclass
+class Option:
+    uri_path: str
+    text_de: str = ''
+    text_en: str = ''
+
+@slotted
+@dataclass
+class Question:
+    uri_path: str
+    attribute: str #path of the attribute
+    text_de: str = ''
+    text_en: str = ''
+    default_text_de: str = ''
+    default_text_en: str = ''
+    comment: str = ''
+    widget_type: str = 'text'
+    value_type: str = 'text'
+    optionsets: Tuple[str, ...] = ()
+
+@dataclass
+class Model:
+    catalogs: Dict[str, Catalog] = field(default_factory=dict)
+    sections: Dict[str, Section] = field(default_factory=dict)
+    pages: Dict[str, Page] = field(default_factory=dict)
+    questionsets: Dict[str, QuestionSet] = field(default_factory=dict)
+    questions: Dict[str, Question] = field(default_factory=dict)
+    attributes: Dict[str, Attribute] = field(default_factory=dict)
+    optionsets: Dict[str, OptionSet] = field(default_factory=dict)
+    options: Dict[str, Option] = field(default_factory=dict)
+    # (container, member) pairs, so membership checks don't scan the lists
+    _links: set = field(default_factory=set, repr=False, compare=False)
+
+    def add_row(self, row):
+        keys = row_keys(row)
+
+        catalog = self._get(self.catalogs, Catalog, keys.catalog, row.catalog)
+
+        section_attribute = self._attribute(keys.section_attribute)
+        section = self._get(self.sections, Section, keys.section, row.section)
+        self._link(catalog, 'sections', section.uri_path)
+
+        # pages are identical with sections
+        page = self._get(self.pages, Page, keys.page, row.section)
+        self._link(section, 'pages', page.uri_path)
+
+        questionset_attribute = self._attribute(keys.questionset_attribute, section_attribute)
+        questionset = self._get(self.questionsets, QuestionSet, keys.questionset, row.questionset)
+        self._link(page, 'questionsets', questionset.uri_path)
+
+        if row.widgettype not in WIDGET_TYPES:
+            return
+
+        question_attribute = self._attribute(keys.question_attribute, questionset_attribute)
+        optionsets = ()
+        optionset_name = str(row.optionset or row.options).strip() #unnamed sets are named by their options
+        if optionset_name:
+            optionset = self.add_options(optionset_name, parse_options(row.options))
+            optionsets = (optionset.uri_path,)
+        question = Question(
+            uri_path=keys.question,
+            attribute=question_attribute.path,
+            text_de=_text(row.frage_de),
+            text_en=_text(row.frage_en),
+            default_text_de=_text(row.defaultanswer_de),
+            default_text_en=_text(row.defaultanswer_en),
+            comment=_text(row.comment),
+            widget_type=row.widgettype,
+            value_type=str(row.valuetype).strip() or WIDGET_TYPES[row.widgettype],
+            optionsets=optionsets,
+        )
+        self.questions.setdefault(question.uri_path, question)
+        self._link(questionset, 'questions', question.uri_path)
+
+    def _attribute(self, key, parent=None):
+        path = key if parent is None else parent.path + '/' + key
+        if path not in self.attributes:
+            self.attributes[path] = Attribute(path, key, None if parent is None else parent.path)
+        return self.attributes[path]
+
+    def add_options(self, optionset_name, options):
+        # options: (text_de, text_en) pairs, appended to the option set unless
+        # it has them already
+        optionset = self._get(self.optionsets, OptionSet, optionset_key(optionset_name), optionset_name)
+        for text_de, text_en in options:
+            key = option_key(optionset_name, text_de)
+            self.options.setdefault(key, Option(key, text_de, text_en))
+            self._link(optionset, 'options', key)
+        return optionset
+
+    def merge(self, other):
+        # adds the elements of another model, e.g. of another workbook; shared
+        # elements (like section attributes) are kept once
+        for name in ('attributes', 'options', 'optionsets', 'questions', 'questionsets', 'pages', 'sections', 'catalogs'):
+            elements = getattr(self, name)
+            for ref, element in getattr(other, name).items():
+                members = _MEMBERS.get(name)
+                if ref not in elements:
+                    elements[ref] = replace(element, **{members: []}) if members else element
+                if members:
+                    for member in getattr(element, members):
+                        self._link(elements[ref], members, member)
+        return self
+
+    def _link(self, container, members, ref):
+        link = (members, container.uri_path, ref)
+        if link not in self._links:
+            self._links.add(link)
+            getattr(container, members).append(ref)
+
+    @staticmethod
+    def _get(elements, cls, uri_path, title):
+        if uri_path not in elements:
+            elements[uri_path] = cls(uri_path, _text(title))
+        return elements[uri_path]
+
+
+_MEMBERS = {
+    'catalogs': 'sections',
+    'sections': 'pages',
+    'pages': 'questionsets',
+    'questionsets': 'questions',
+    'optionsets': 'options',
+}
+
+def _text(value):
+    # numeric cells come as int or float, but RDMO returns text (0 != '0')
+    return '' if value is None else str(value)
+
+def parse_options(text):
+    options = []
+    for item in _OPTION_SEPARATOR.split(str(text)):
+        text_de, _, text_en = item.partition('|')
+        if text_de.strip():
+            options.append((text_de.strip(), text_en.strip()))
+    return options
+
+def build_model(rows, options=()):
+    # options: OptionRows of the options sheet, added first, so the sheet
+    # sets the order of the options
+    model = Model()
+    for option in options:
+        model.add_options(str(option.optionset).strip(), [(str(option.text_de).strip(), str(option.text_en).strip())])
+    for row in rows:
+        model.add_row(row)
+    return model
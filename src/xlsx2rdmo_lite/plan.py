@@ -0,0 +1,406 @@
+from collections import Counter, namedtuple
+from dataclasses import dataclass, field
+
+from .model import slotted
+
+# kind -> name of the collection on the client (list_<plural>) and in the model
+PLURALS = {
+    'attribute': 'attributes',
+    'catalog': 'catalogs',
+    'section': 'sections',
+    'page': 'pages',
+    'questionset': 'questionsets',
+    'question': 'questions',
+    'optionset': 'optionsets',
+    'option': 'options',
+}
+
+# kind -> app in the uris RDMO gives the elements (uri_prefix/<app>/<path>)
+APPS = {
+    kind: 'domain' if kind == 'attribute' else 'options' if kind in ('optionset', 'option') else 'questions'
+    for kind in PLURALS
+}
+
+# container kind -> (field holding the memberships, kind of the members)
+MEMBERS = {
+    'catalog': ('sections', 'section'),
+    'section': ('pages', 'page'),
+    'page': ('questionsets', 'questionset'),
+    'questionset': ('questions', 'question'),
+    'optionset': ('options', 'option'),
+}
+
+# container kind -> all membership relations, including nested questionsets
+# and questions on pages, which the importer doesn't create itself
+SUBTREE = {
+    'catalog': (('sections', 'section'),),
+    'section': (('pages', 'page'),),
+    'page': (('questionsets', 'questionset'), ('questions', 'question')),
+    'questionset': (('questionsets', 'questionset'), ('questions', 'question')),
+}
+
+# members are sent along with their container, so containers are written
+# after their members and every container costs at most one request
+ORDER = ('attribute', 'option', 'optionset', 'question', 'questionset', 'page', 'section', 'catalog')
+
+# placeholder for the server id of an element, which might not exist yet
+# while planning
+Ref = namedtuple('Ref', ['kind', 'ref'])
+
+# changes to the memberships of a container: members to append and members
+# to drop, applied to the entries the container has when the request is sent
+Members = namedtuple('Members', ['kind', 'added', 'removed'], defaults=((),))
+
+# placeholder for the ids of several elements (a list of ids, like the
+# option sets of a question), replacing what the element had
+Refs = namedtuple('Refs', ['kind', 'refs'])
+
+
+@slotted
+@dataclass
+class Operation:
+    action: str #'create', 'update' or 'destroy'
+    kind: str
+    ref: str #uri_path, or path for attributes
+    data: dict = field(default_factory=dict)
+    requires: tuple = () #refs of elements to be written first, besides those in data
+
+    def refs(self):
+        yield from self.requires
+        for value in self.data.values():
+            if isinstance(value, Ref):
+                yield value
+            elif isinstance(value, Refs):
+                for ref in value.refs:
+                    yield Ref(value.kind, ref)
+            elif isinstance(value, Members):
+                yield from value.added
+                yield from value.removed
+
+    def __str__(self):
+        text = '{} {} {}'.format(self.action, self.kind, self.ref)
+        if self.kind in MEMBERS and MEMBERS[self.kind][0] in self.data:
+            members, member_kind = MEMBERS[self.kind]
+            change = self.data[members]
+            text += ' (+{} {}{})'.format(
+                len(change.added), members,
+                ', -{}'.format(len(change.removed)) if change.removed else ''
+            )
+        return text
+
+
+# action -> outcome, as reported after an import
+OUTCOMES = {'create': 'created', 'update': 'updated', 'destroy': 'destroyed'}
+
+
+class Plan:
+    def __init__(self, operations=None, unchanged=None):
+        self.operations = list(operations or [])
+        self.unchanged = Counter(unchanged or {}) #kind -> elements, which are up to date already
+
+    def __iter__(self):
+        return iter(self.operations)
+
+    def __len__(self):
+        return len(self.operations)
+
+    def counts(self):
+        return Counter((op.action, op.kind) for op in self.operations)
+
+    def totals(self):
+        # number of elements created, updated, destroyed and left unchanged
+        totals = {outcome: 0 for outcome in OUTCOMES.values()}
+        for (action, kind), n in self.counts().items():
+            totals[OUTCOMES[action]] += n
+        totals['unchanged'] = sum(self.unchanged.values())
+        return totals
+
+    def summary(self):
+        parts = [
+            '{} {} {}'.format(n, action, kind)
+            for (action, kind), n in sorted(self.counts().items())
+        ]
+        if self.unchanged:
+            parts.append('{} unchanged'.format(sum(self.unchanged.values())))
+        if not self.operations:
+            return 'nothing to do' + (' ({})'.format(parts[0]) if parts else '')
+        return ', '.join(parts)
+
+
+def payload(kind, element, uri_prefix):
+    if kind == 'attribute':
+        data = {"uri_prefix": uri_prefix, "key": element.key}
+        if element.parent is not None:
+            data['parent'] = Ref('attribute', element.parent)
+        return data
+    if kind == 'question':
+        return {
+            "uri_prefix": uri_prefix,
+            "uri_path": element.uri_path,
+            "comment": element.comment,
+            "attribute": Ref('attribute', element.attribute),
+            "text_en": element.text_en,
+            "default_text_en": element.default_text_en,
+            "text_de": element.text_de,
+            "default_text_de": element.default_text_de,
+            "value_type": element.value_type,
+            "widget_type": element.widget_type,
+            "optionsets": Refs('optionset', tuple(element.optionsets)),
+        }
+    if kind == 'option':
+        return {
+            "uri_prefix": uri_prefix,
+            "uri_path": element.uri_path,
+            "text_en": element.text_en,
+            "text_de": element.text_de,
+        }
+    if kind == 'optionset':
+        return {"uri_prefix": uri_prefix, "uri_path": element.uri_path}
+    return {
+        "uri_prefix": uri_prefix,
+        "uri_path": element.uri_path,
+        "title_en": element.title,
+        "title_de": element.title,
+    }
+
+def _changed(existing, data, state):
+    # only fields the server returns are compared, anything else can't differ
+    for key, value in data.items():
+        if isinstance(value, Members):
+            if value.added or value.removed:
+                return True
+            continue
+        if isinstance(value, Refs):
+            value = [state.id(Ref(value.kind, ref)) for ref in value.refs]
+            if None in value:
+                return True
+            if key in existing and set(existing[key]) != set(value):
+                return True
+            continue
+        if isinstance(value, Ref):
+            value = state.id(value)
+            if value is None: #referenced element doesn't exist yet
+                return True
+        if key in existing and existing[key] != value:
+            return True
+    return False
+
+def _missing_members(kind, container, existing, state):
+    members, member_kind = MEMBERS[kind]
+    present = {f[member_kind] for f in existing.get(members, [])}
+    missing = []
+    for member_ref in getattr(container, members):
+        member = Ref(member_kind, member_ref)
+        member_id = state.id(member)
+        if member_id is None or member_id not in present:
+            missing.append(member)
+    return missing
+
+def make_plan(model, state, uri_prefix, removed=None):
+    # removed: uri_paths of questions, which are gone from the sheet, mapped
+    # to the uri_path of their questionset
+    operations = []
+    unchanged = Counter()
+    removed_from = {}
+    for question, questionset in (removed or {}).items():
+        if state.get('question', question) is not None and state.get('questionset', questionset) is not None:
+            removed_from.setdefault(questionset, []).append(Ref('question', question))
+
+    # attributes before anything referencing them (parents before children),
+    # members before their containers
+    for kind in ORDER:
+        for ref, element in getattr(model, PLURALS[kind]).items():
+            data = payload(kind, element, uri_prefix)
+            existing = state.get(kind, ref)
+            if kind in MEMBERS:
+                members, member_kind = MEMBERS[kind]
+                if existing is None:
+                    data[members] = Members(member_kind, [Ref(member_kind, f) for f in getattr(element, members)])
+                else:
+                    missing = _missing_members(kind, element, existing, state)
+                    dropped = removed_from.pop(ref, []) if kind == 'questionset' else []
+                    if missing or dropped:
+                        data[members] = Members(member_kind, missing, dropped)
+            if existing is None:
+                operations.append(Operation('create', kind, ref, data))
+            elif _changed(existing, data, state):
+                operations.append(Operation('update', kind, ref, data))
+            else:
+                unchanged[kind] += 1
+
+    # questionsets, which only lose questions
+    for ref, dropped in removed_from.items():
+        operations.append(Operation('update', 'questionset', ref, {'questions': Members('question', [], dropped)}))
+
+    # the questions themselves are only destroyed, if no other questionset
+    # still uses them (questions can be shared between catalogs)
+    if removed:
+        users = Counter(
+            f['question']
+            for other in state.elements('questionset')
+            for f in other.get('questions', [])
+        )
+        for question, questionset in removed.items():
+            question_id = state.id(Ref('question', question))
+            if question_id is None:
+                continue
+            own = state.get('questionset', questionset)
+            if own is not None and question_id in {f['question'] for f in own.get('questions', [])}:
+                users[question_id] -= 1
+            if users[question_id] <= 0:
+                operations.append(Operation(
+                    'destroy', 'question', question, requires=(Ref('questionset', questionset),)
+                ))
+
+    return Plan(operations, unchanged)
+
+def _subtree(state, kind, element):
+    # ids of the element and everything below it, by kind
+    ids = {k: set() for k in PLURALS}
+    ids[kind].add(element['id'])
+    containers = [(kind, element)]
+    while containers:
+        kind, container = containers.pop()
+        for members, member_kind in SUBTREE.get(kind, ()):
+            for f in container.get(members, []):
+                if f[member_kind] not in ids[member_kind]:
+                    ids[member_kind].add(f[member_kind])
+                    member = state.indexes[member_kind].get_by_id(f[member_kind])
+                    if member is not None:
+                        containers.append((member_kind, member))
+    return ids
+
+def _kept(state, ids):
+    # elements of the subtree, which are also members of containers outside
+    # of it, are kept with everything below them
+    kept = {kind: set() for kind in PLURALS}
+    for kind, relations in SUBTREE.items():
+        for container in state.elements(kind):
+            if container['id'] in ids[kind]:
+                continue
+            for members, member_kind in relations:
+                for f in container.get(members, []):
+                    member = state.indexes[member_kind].get_by_id(f[member_kind])
+                    if f[member_kind] in ids[member_kind] and member is not None:
+                        for sub_kind, sub_ids in _subtree(state, member_kind, member).items():
+                            kept[sub_kind] |= sub_ids
+    return kept
+
+def make_delete_plan(state, catalog=None):
+    # destroys everything (of every uri_prefix), or only the elements of one
+    # catalog, which no other catalog uses; elements are destroyed by id, and
+    # the deletes don't depend on each other and can all run in parallel
+    attributes = state.attributes
+    if catalog is None:
+        ids = {kind: {obj['id'] for obj in state.elements(kind)} for kind in PLURALS}
+    else:
+        ids = _subtree(state, 'catalog', catalog)
+        kept = _kept(state, ids)
+        for kind in PLURALS:
+            ids[kind] -= kept[kind]
+        # attributes of the deleted questions and their parents, unless an
+        # element outside of the subtree still refers to them
+        used = set()
+        for kind in ('page', 'questionset', 'question'):
+            for element in state.elements(kind):
+                if element['id'] not in ids[kind] and element.get('attribute') is not None:
+                    used.add(element['attribute'])
+        ids['attribute'] = set()
+        for question_id in ids['question']:
+            question = state.indexes['question'].get_by_id(question_id) or {}
+            attribute = attributes.get_by_id(question.get('attribute'))
+            while attribute is not None and attribute['id'] not in ids['attribute']:
+                ids['attribute'].add(attribute['id'])
+                attribute = attributes.get_by_id(attribute.get('parent'))
+        children = {}
+        for attribute in attributes:
+            children.setdefault(attribute.get('parent'), []).append(attribute['id'])
+
+        deletable = {}
+        def is_deletable(attribute_id):
+            # deleting an attribute deletes all its descendants as well
+            if attribute_id not in deletable:
+                deletable[attribute_id] = attribute_id in ids['attribute'] and attribute_id not in used and all(
+                    is_deletable(child) for child in children.get(attribute_id, [])
+                )
+            return deletable[attribute_id]
+        ids['attribute'] = {attribute_id for attribute_id in ids['attribute'] if is_deletable(attribute_id)}
+
+        # option sets of the deleted questions and their options, unless a
+        # question (or option set) outside of the subtree still uses them
+        ids['optionset'] = {
+            optionset_id for question_id in ids['question']
+            for optionset_id in (state.indexes['question'].get_by_id(question_id) or {}).get('optionsets', [])
+        } - {
+            optionset_id for question in state.elements('question') if question['id'] not in ids['question']
+            for optionset_id in question.get('optionsets', [])
+        }
+        ids['option'] = {
+            f['option'] for optionset_id in ids['optionset']
+            for f in (state.indexes['optionset'].get_by_id(optionset_id) or {}).get('options', [])
+        } - {
+            f['option'] for optionset in state.elements('optionset') if optionset['id'] not in ids['optionset']
+            for f in optionset.get('options', [])
+        }
+
+    operations = []
+    for kind in ('catalog', 'section', 'page', 'questionset', 'question', 'optionset', 'option', 'attribute'):
+        index = state.indexes[kind]
+        for element_id in sorted(ids[kind]):
+            element = index.get_by_id(element_id)
+            if element is None:
+                continue
+            # children are deleted along with their parent attribute
+            if kind == 'attribute' and element.get('parent') in ids['attribute']:
+                continue
+            operations.append(Operation('destroy', kind, element[index.key], {'id': element_id}))
+    return Plan(operations)
+
+def _request(state, op):
+    # name of the client method and its arguments, with ids resolved at the
+    # time the request is sent
+    if op.action == 'create':
+        return 'create_' + op.kind, (state.resolve(op.data),)
+    if op.action not in ('update', 'destroy'):
+        raise ValueError('unknown action: {}'.format(op.action))
+    existing = _existing(state, op)
+    if op.action == 'update':
+        data = dict(existing)
+        data.update(state.resolve(op.data, existing))
+        return 'update_' + op.kind, (existing['id'], data)
+    return 'destroy_' + op.kind, (existing['id'],)
+
+def _existing(state, op):
+    # the deletes of make_delete_plan name the element by id, it may belong
+    # to another uri_prefix
+    if op.action == 'destroy' and 'id' in op.data:
+        return state.indexes[op.kind].get_by_id(op.data['id'])
+    return state.get(op.kind, op.ref)
+
+def _record(state, op, obj):
+    # updates the state with the response
+    if op.action == 'destroy':
+        existing = _existing(state, op)
+        if op.kind == 'attribute':
+            # the server deletes the descendants along with the attribute; the
+            # children are collected in one pass, not one per descendant
+            children = {}
+            for attribute in state.attributes:
+                if attribute.get('parent') is not None:
+                    children.setdefault(attribute['parent'], []).append(attribute['id'])
+            parents = [existing['id']]
+            while parents:
+                for child in children.pop(parents.pop(), ()):
+                    parents.append(child)
+                    state.attributes.remove_id(child)
+        return state.indexes[op.kind].remove_id(existing['id'])
+    return state.put(op.kind, obj)
+
+def apply_operation(client, state, op):
+    name, args = _request(state, op)
+    return _record(state, op, getattr(client, name)(*args))
+
+async def apply_operation_async(client, state, op):
+    # the same with a client, whose methods are coroutines
+    name, args = _request(state, op)
+    return _record(state, op, await getattr(client, name)(*args))
@@ -0,0 +1,119 @@
+import datetime
+from xml.sax.saxutils import XMLGenerator
+
+from .plan import APPS, ORDER, PLURALS
+
+# Writes a Model as RDMO element xml, which RDMO imports in a single upload
+# (Management -> Import). The document is streamed element by element, no
+# tree is built. Elements are written members first (attributes parents
+# first), so every reference points to an element further up.
+
+DC = 'http://purl.org/dc/elements/1.1/'
+VERSION = '2.0.0'
+LANGUAGES = ('en', 'de')
+
+
+class _Writer:
+    def __init__(self, out, uri_prefix):
+        self.xml = XMLGenerator(out, 'utf-8', short_empty_elements=True)
+        self.uri_prefix = uri_prefix.rstrip('/')
+
+    def uri(self, kind, path):
+        return '{}/{}/{}'.format(self.uri_prefix, APPS[kind], path)
+
+    def text(self, name, value, attrs=None):
+        self.xml.startElement(name, attrs or {})
+        if value:
+            self.xml.characters(str(value))
+        self.xml.endElement(name)
+
+    def ref(self, name, uri, order=None):
+        # reference to another element, empty if there is none
+        attrs = {} if uri is None else {'dc:uri': uri}
+        if order is not None:
+            attrs['order'] = str(order)
+        self.xml.startElement(name, attrs)
+        self.xml.endElement(name)
+
+    def start(self, kind, uri):
+        self.xml.ignorableWhitespace('\n\t')
+        self.xml.startElement(kind, {'dc:uri': uri})
+
+    def end(self, kind):
+        self.xml.endElement(kind)
+
+    def members(self, name, kind, uri_paths):
+        self.xml.startElement(name, {})
+        for order, uri_path in enumerate(uri_paths, 1):
+            self.ref(kind, self.uri(kind, uri_path), order)
+        self.xml.endElement(name)
+
+    def languages(self, name, values):
+        for lang in LANGUAGES:
+            self.text(name, values.get(lang, ''), {'lang': lang})
+
+
+def write_xml(model, out, uri_prefix):
+    # out: binary file object
+    w = _Writer(out, uri_prefix)
+    w.xml.startDocument()
+    w.xml.startElement('rdmo', {
+        'xmlns:dc': DC,
+        'version': VERSION,
+        'created': datetime.datetime.now().replace(microsecond=0).isoformat(),
+    })
+
+    for kind in ORDER:
+        for uri_path, element in getattr(model, PLURALS[kind]).items(): #attributes: path
+            w.start(kind, w.uri(kind, uri_path))
+            w.text('uri_prefix', w.uri_prefix)
+            if kind == 'attribute':
+                w.text('key', element.key)
+                w.text('path', uri_path)
+                w.text('dc:comment', '')
+                w.ref('parent', None if element.parent is None else w.uri('attribute', element.parent))
+            elif kind == 'question':
+                w.text('uri_path', uri_path)
+                w.text('dc:comment', element.comment)
+                w.ref('attribute', w.uri('attribute', element.attribute))
+                w.text('is_collection', 'False')
+                w.text('is_optional', 'False')
+                w.languages('text', {'de': element.text_de, 'en': element.text_en})
+                w.languages('default_text', {'de': element.default_text_de, 'en': element.default_text_en})
+                w.text('widget_type', element.widget_type)
+                w.text('value_type', element.value_type)
+                w.xml.startElement('optionsets', {})
+                for optionset in element.optionsets:
+                    w.ref('optionset', w.uri('optionset', optionset))
+                w.xml.endElement('optionsets')
+            elif kind == 'option':
+                w.text('uri_path', uri_path)
+                w.text('dc:comment', '')
+                w.languages('text', {'de': element.text_de, 'en': element.text_en})
+            elif kind == 'optionset':
+                w.text('uri_path', uri_path)
+                w.text('dc:comment', '')
+                w.text('order', '0')
+                w.members('options', 'option', element.options)
+            else:
+                w.text('uri_path', uri_path)
+                w.text('dc:comment', '')
+                if kind in ('page', 'questionset'):
+                    w.ref('attribute', None)
+                    w.text('is_collection', 'False')
+                w.languages('title', {'de': element.title, 'en': element.title})
+                if kind == 'catalog':
+                    w.members('sections', 'section', element.sections)
+                elif kind == 'section':
+                    w.members('pages', 'page', element.pages)
+                elif kind == 'page':
+                    w.members('questionsets', 'questionset', element.questionsets)
+                    w.members('questions', 'question', [])
+                else:
+                    w.members('questionsets', 'questionset', [])
+                    w.members('questions', 'question', element.questions)
+            w.end(kind)
+
+    w.xml.ignorableWhitespace('\n')
+    w.xml.endElement('rdmo')
+    w.xml.endDocument()
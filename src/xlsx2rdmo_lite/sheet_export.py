@@ -0,0 +1,72 @@
+from .log import log
+from .model import WIDGET_TYPES
+from .spreadsheet import Row
+
+# The questions of a catalog on the server as rows in the layout of the
+# sheet, so a catalog can be edited as a workbook and imported again. The
+# tree is joined in memory from the snapshot (one listing per collection),
+# no element is fetched on its own, and the rows are generated one by one,
+# so they can be streamed into the written sheet. Keys are derived from
+# the names again on import, so titles and texts must stay the names the
+# keys came from.
+
+
+def _members(state, container, members, member_kind):
+    # the members of a container in their order; ids unknown to the
+    # snapshot are left out
+    index = state.indexes[member_kind]
+    for entry in sorted(container.get(members, []), key=lambda f: f.get('order', 0)):
+        member = index.get_by_id(entry[member_kind])
+        if member is not None:
+            yield member
+
+def _title(element):
+    return element.get('title_de') or element.get('title_en') or element['uri_path']
+
+def _optionset_name(optionset):
+    uri_path = optionset['uri_path']
+    return uri_path[len('optionset-'):] if uri_path.startswith('optionset-') else uri_path
+
+def _options(state, optionset):
+    return '; '.join(
+        option.get('text_de', '') + (' | ' + option['text_en'] if option.get('text_en') else '')
+        for option in _members(state, optionset, 'options', 'option')
+    )
+
+def catalog_rows(state, catalog):
+    # catalog: element of the snapshot; yields a Row per question
+    skipped = 0
+    listed = set() #option sets, whose options are in a row already
+    for section in _members(state, catalog, 'sections', 'section'):
+        for page in _members(state, section, 'pages', 'page'):
+            skipped += len(page.get('questions', []))
+            for position, questionset in enumerate(_members(state, page, 'questionsets', 'questionset')):
+                skipped += len(questionset.get('questionsets', []))
+                for question in _members(state, questionset, 'questions', 'question'):
+                    optionset, options = '', ''
+                    optionsets = [state.indexes['optionset'].get_by_id(i) for i in question.get('optionsets', [])]
+                    optionsets = [o for o in optionsets if o is not None]
+                    if optionsets:
+                        optionset = _optionset_name(optionsets[0])
+                        if optionsets[0]['id'] not in listed:
+                            listed.add(optionsets[0]['id'])
+                            options = _options(state, optionsets[0])
+                    widget_type = question.get('widget_type') or 'text'
+                    value_type = question.get('value_type') or ''
+                    yield Row({
+                        'catalog': _title(catalog),
+                        'section': _title(section),
+                        'questionset': _title(questionset),
+                        'position': position,
+                        'frage_de': question.get('text_de', ''),
+                        'frage_en': question.get('text_en', ''),
+                        'defaultanswer_de': question.get('default_text_de', ''),
+                        'defaultanswer_en': question.get('default_text_en', ''),
+                        'comment': question.get('comment', ''),
+                        'widgettype': widget_type,
+                        'valuetype': '' if WIDGET_TYPES.get(widget_type) == value_type else value_type,
+                        'optionset': optionset,
+                        'options': options,
+                    })
+    if skipped:
+        log.warning('%d questions on pages and nested questionsets have no place in the sheet and were skipped', skipped)
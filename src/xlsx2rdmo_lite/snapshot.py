@@ -0,0 +1,259 @@
+import asyncio
+import json
+import os
+import time
+
+from .plan import PLURALS, Members, Ref, Refs
+
+# Snapshot of the existing elements of the RDMO instance: every collection is
+# listed once (following pagination, if the server paginates), only the
+# fields the importer needs are kept, and the elements are indexed by their
+# uri_prefix and uri_path (attributes: path, as keys are only unique among
+# the children of an attribute), uri and id. Elements of other uri_prefixes
+# are kept, e.g. to delete everything, but are never the importer's own. The
+# snapshot is kept up to date from the responses of the write requests and
+# can be cached on disk between runs.
+
+VERSION = 2
+
+# fields kept per kind, everything else of the server's response is dropped
+FIELDS = {
+    'attribute': ('id', 'uri', 'uri_prefix', 'key', 'path', 'parent'),
+    'catalog': ('id', 'uri', 'uri_prefix', 'uri_path', 'title_de', 'title_en', 'sections'),
+    'section': ('id', 'uri', 'uri_prefix', 'uri_path', 'title_de', 'title_en', 'pages'),
+    'page': ('id', 'uri', 'uri_prefix', 'uri_path', 'attribute', 'title_de', 'title_en', 'questionsets', 'questions'),
+    'questionset': (
+        'id', 'uri', 'uri_prefix', 'uri_path', 'attribute', 'title_de', 'title_en', 'questionsets', 'questions',
+    ),
+    'question': (
+        'id', 'uri', 'uri_prefix', 'uri_path', 'attribute', 'comment',
+        'text_de', 'text_en', 'default_text_de', 'default_text_en',
+        'value_type', 'widget_type', 'optionsets',
+    ),
+    'optionset': ('id', 'uri', 'uri_prefix', 'uri_path', 'options'),
+    'option': ('id', 'uri', 'uri_prefix', 'uri_path', 'text_de', 'text_en'),
+}
+
+# field the importer identifies the elements of a kind by, within their
+# uri_prefix
+KEYS = {kind: ('path' if kind == 'attribute' else 'uri_path') for kind in PLURALS}
+
+
+class Index:
+    # elements of one collection by (uri_prefix, uri_path or path), uri and id
+    def __init__(self, key, elements=()):
+        self.key = key
+        self.by_key = {}
+        self.by_uri = {}
+        self.by_id = {}
+        for element in elements:
+            # first match wins, like the former list scans did
+            if self.identity(element) not in self.by_key:
+                self.add(element)
+
+    def identity(self, element):
+        return (element.get('uri_prefix'), element.get(self.key))
+
+    def add(self, element):
+        old = self.by_id.get(element.get('id'))
+        if old is not None and self.identity(old) != self.identity(element): #moved, e.g. a new parent
+            self.remove(self.identity(old))
+        old = self.by_key.get(self.identity(element))
+        if old is not None:
+            self.by_uri.pop(old.get('uri'), None)
+            self.by_id.pop(old.get('id'), None)
+        self.by_key[self.identity(element)] = element
+        if element.get('uri'):
+            self.by_uri[element['uri']] = element
+        if element.get('id') is not None:
+            self.by_id[element['id']] = element
+        return element
+
+    def remove(self, key):
+        element = self.by_key.pop(key, None)
+        if element is not None:
+            self.by_uri.pop(element.get('uri'), None)
+            self.by_id.pop(element.get('id'), None)
+        return element
+
+    def remove_id(self, id):
+        element = self.by_id.get(id)
+        return None if element is None else self.remove(self.identity(element))
+
+    def get(self, key, default=None):
+        return self.by_key.get(key, default)
+
+    def get_by_uri(self, uri, default=None):
+        return self.by_uri.get(uri, default)
+
+    def get_by_id(self, id, default=None):
+        return self.by_id.get(id, default)
+
+    def __getitem__(self, key):
+        return self.by_key[key]
+
+    def __contains__(self, key):
+        return key in self.by_key
+
+    def __iter__(self):
+        return iter(list(self.by_key.values()))
+
+    def __len__(self):
+        return len(self.by_key)
+
+
+def project(kind, obj):
+    return {field: obj[field] for field in FIELDS[kind] if field in obj}
+
+def fetch(client, kind):
+    # all elements of a collection; a paginated response ({'results': [...],
+    # 'next': ...}) is followed page by page
+    list_method = getattr(client, 'list_' + PLURALS[kind])
+    response = list_method()
+    if isinstance(response, dict) and 'results' in response:
+        results = list(response['results'])
+        page = 1
+        while response.get('next'):
+            page += 1
+            response = list_method(page=page)
+            results.extend(response['results'])
+        response = results
+    return [project(kind, obj) for obj in response]
+
+async def fetch_async(client, kind):
+    # fetch() with a client, whose methods are coroutines
+    list_method = getattr(client, 'list_' + PLURALS[kind])
+    response = await list_method()
+    if isinstance(response, dict) and 'results' in response:
+        results = list(response['results'])
+        page = 1
+        while response.get('next'):
+            page += 1
+            response = await list_method(page=page)
+            results.extend(response['results'])
+        response = results
+    return [project(kind, obj) for obj in response]
+
+
+class Snapshot:
+    def __init__(self, collections=None, uri_prefix=None):
+        # uri_prefix: of the importer's elements, the ones get() finds
+        collections = collections or {}
+        self.uri_prefix = uri_prefix
+        self.indexes = {kind: Index(KEYS[kind], collections.get(kind, ())) for kind in PLURALS}
+
+    @classmethod
+    def fetch(cls, client, uri_prefix=None):
+        # one listing per collection
+        return cls({kind: fetch(client, kind) for kind in PLURALS}, uri_prefix)
+
+    @classmethod
+    async def fetch_async(cls, client, uri_prefix=None):
+        # all collections listed at once
+        collections = await asyncio.gather(*(fetch_async(client, kind) for kind in PLURALS))
+        return cls(dict(zip(PLURALS, collections)), uri_prefix)
+
+    @classmethod
+    def load(cls, client, cache=None, server=None, max_age=3600, uri_prefix=None):
+        # uses the cache file, if it belongs to the same server and was
+        # written less than max_age seconds ago, and lists the server otherwise
+        snapshot = cls.cached(cache, server, max_age, uri_prefix)
+        if snapshot is None:
+            snapshot = cls.fetch(client, uri_prefix)
+            if cache is not None:
+                snapshot.save(cache, server)
+        return snapshot
+
+    @classmethod
+    async def load_async(cls, client, cache=None, server=None, max_age=3600, uri_prefix=None):
+        snapshot = cls.cached(cache, server, max_age, uri_prefix)
+        if snapshot is None:
+            snapshot = await cls.fetch_async(client, uri_prefix)
+            if cache is not None:
+                snapshot.save(cache, server)
+        return snapshot
+
+    @classmethod
+    def cached(cls, cache, server=None, max_age=3600, uri_prefix=None):
+        # the snapshot in the cache file, or None
+        if cache is not None and os.path.exists(cache) and time.time() - os.path.getmtime(cache) < max_age:
+            try:
+                with open(cache, encoding='utf-8') as f:
+                    data = json.load(f)
+            except ValueError:
+                data = {}
+            if data.get('version') == VERSION and data.get('server') == list(server or ()):
+                return cls(data['collections'], uri_prefix)
+        return None
+
+    def save(self, cache, server=None):
+        data = {
+            'version': VERSION,
+            'server': list(server or ()),
+            'collections': {kind: list(index.by_key.values()) for kind, index in self.indexes.items()},
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(cache)), exist_ok=True)
+        tmp = cache + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, cache)
+
+    def copy(self):
+        # elements are replaced, never changed in place, so they can be shared
+        return Snapshot({kind: list(index) for kind, index in self.indexes.items()}, self.uri_prefix)
+
+    @staticmethod
+    def invalidate(cache):
+        if cache is not None and os.path.exists(cache):
+            os.remove(cache)
+
+    @property
+    def attributes(self):
+        return self.indexes['attribute']
+
+    def elements(self, kind):
+        return iter(self.indexes[kind])
+
+    def get(self, kind, ref):
+        # ref: uri_path (attributes: path) of one of the importer's elements
+        return self.indexes[kind].get((self.uri_prefix, ref))
+
+    def put(self, kind, obj):
+        return self.indexes[kind].add(project(kind, obj))
+
+    def remove(self, kind, ref):
+        return self.indexes[kind].remove((self.uri_prefix, ref))
+
+    def id(self, ref):
+        obj = self.get(ref.kind, ref.ref)
+        return None if obj is None else obj['id']
+
+    def resolve(self, data, existing=None):
+        # replaces the Refs and Members of planned data by ids
+        resolved = {}
+        for key, value in data.items():
+            if isinstance(value, Ref):
+                value = self.id(value)
+            elif isinstance(value, Refs):
+                value = [self.id(Ref(value.kind, ref)) for ref in value.refs]
+            elif isinstance(value, Members):
+                value = self._resolve_members(value, [] if existing is None else existing.get(key, []))
+            resolved[key] = value
+        return resolved
+
+    def _resolve_members(self, value, entries):
+        member_kind = value.kind
+        if value.removed:
+            removed = {self.id(ref) for ref in value.removed}
+            entries = [f for f in entries if f[member_kind] not in removed]
+        else:
+            entries = list(entries)
+        present = {f[member_kind] for f in entries}
+        order = max([f['order'] for f in entries], default=0)
+        for ref in value.added:
+            member_id = self.id(ref)
+            if member_id not in present:
+                order += 1
+                entries.append({member_kind: member_id, 'order': order})
+                present.add(member_id)
+        return entries
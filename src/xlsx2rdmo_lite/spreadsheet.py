@@ -0,0 +1,403 @@
+import csv
+from collections import namedtuple
+import os
+import posixpath
+import re
+import sys
+import zipfile
+from xml.etree.ElementTree import iterparse, parse
+from xml.sax.saxutils import escape, quoteattr
+
+# Lightweight row reader (and writer) for .xlsx, .ods and .csv files. Rows
+# are streamed from the sheet xml one at a time, nothing but the shared
+# strings table is kept in memory; written sheets use inline strings, so
+# they are streamed as well.
+
+# header of the sheet -> attribute of Row
+COLUMNS = {
+    0: 'catalog',
+    1: 'section',
+    2: 'questionset',
+    3: 'position',
+    'frage_de': 'frage_de',
+    'frage_en': 'frage_en',
+    'defaultanswer_de': 'defaultanswer_de',
+    'defaultanswer_en': 'defaultanswer_en',
+    'comment': 'comment',
+    'widgettype': 'widgettype',
+    'valuetype': 'valuetype',
+    'optionset': 'optionset',
+    'options': 'options',
+}
+REQUIRED_COLUMNS = (0, 1, 2, 'frage_de', 'widgettype')
+# columns repeating the same few values, whose strings are shared by all
+# rows instead of a copy per cell (csv, inline strings)
+INTERNED = ('catalog', 'section', 'questionset', 'widgettype', 'valuetype', 'optionset')
+
+# optional second sheet with the options of the option sets, one per line
+OPTIONS_SHEET = 'options'
+OPTION_COLUMNS = {
+    'optionset': 'optionset',
+    'option_de': 'text_de',
+    'option_en': 'text_en',
+}
+REQUIRED_OPTION_COLUMNS = ('optionset', 'option_de')
+
+OptionRow = namedtuple('OptionRow', ['optionset', 'text_de', 'text_en', 'line'])
+
+
+class Row:
+    __slots__ = tuple(COLUMNS.values()) + ('extra', 'line')
+
+    def __init__(self, values=None, extra=None, line=None):
+        values = values or {}
+        for name in COLUMNS.values():
+            setattr(self, name, values.get(name, ''))
+        self.extra = extra #other columns of the sheet, or None
+        self.line = line #number of the line in the sheet, for messages
+
+    def __repr__(self):
+        return 'Row({})'.format(', '.join(
+            '{}={!r}'.format(name, getattr(self, name)) for name in self.__slots__
+        ))
+
+
+def read_rows(path, sheet=None):
+    # yields a Row per non-empty line of the (first, or given) sheet
+    for values, extra, number in _records(path, _lines(path, sheet), COLUMNS, REQUIRED_COLUMNS):
+        for name in INTERNED:
+            if isinstance(values.get(name), str):
+                values[name] = sys.intern(values[name])
+        yield Row(values, extra, number)
+
+def read_options(path):
+    # yields an OptionRow per line of the options sheet, if the workbook has
+    # one (csv files have a single sheet)
+    if os.path.splitext(str(path))[1].lower() == '.csv':
+        return
+    try:
+        lines = list(_lines(path, OPTIONS_SHEET)) #small, read at once to catch a missing sheet
+    except KeyError:
+        return
+    for values, extra, number in _records(path, lines, OPTION_COLUMNS, REQUIRED_OPTION_COLUMNS):
+        yield OptionRow(values.get('optionset', ''), values.get('text_de', ''), values.get('text_en', ''), number)
+
+def _lines(path, sheet):
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext == '.csv':
+        return _csv_lines(path)
+    if ext == '.ods':
+        return _ods_lines(path, sheet)
+    return _xlsx_lines(path, sheet)
+
+def _records(path, lines, columns, required):
+    # (values by attribute, other columns or None, line number) per line
+    header = None
+    for number, line in enumerate(lines, 1):
+        if not any(value != '' for value in line):
+            continue
+        if header is None:
+            header = [_header_name(value) for value in line]
+            missing = [c for c in required if c not in header]
+            if missing:
+                raise ValueError('{}: missing column(s) {}'.format(path, ', '.join(str(c) for c in missing)))
+            continue
+        values = {}
+        extra = None
+        for name, value in zip(header, line):
+            if name in columns:
+                values[columns[name]] = value
+            elif name != '':
+                extra = extra or {}
+                extra[name] = value
+        yield values, extra, number
+
+def _header_name(value):
+    # index columns are named 0-3, which may come as numbers or as text
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return value.strip() if isinstance(value, str) else value
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+# csv
+
+def _csv_lines(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for line in csv.reader(f):
+            yield line
+
+
+# xlsx
+
+_XLSX = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_CELL_REF = re.compile(r'([A-Z]+)')
+
+def _xlsx_lines(path, sheet=None):
+    with zipfile.ZipFile(path) as archive:
+        strings = _shared_strings(archive)
+        with archive.open(_xlsx_sheet_path(archive, sheet)) as f:
+            number = 0
+            for event, elem in iterparse(f):
+                if elem.tag != _XLSX + 'row':
+                    continue
+                # empty rows are left out of the xml, yielded anyway to keep
+                # the line numbers
+                r = int(elem.get('r', number + 1))
+                for _ in range(number + 1, r):
+                    yield []
+                number = r
+                line = []
+                for cell in elem.iter(_XLSX + 'c'):
+                    ref = cell.get('r')
+                    if ref is not None:
+                        index = _column_index(ref)
+                        line.extend([''] * (index - len(line)))
+                    line.append(_xlsx_value(cell, strings))
+                elem.clear()
+                yield line
+
+def _xlsx_sheet_path(archive, sheet):
+    workbook = parse(archive.open('xl/workbook.xml')).getroot()
+    sheets = workbook.find(_XLSX + 'sheets')
+    target = None
+    for elem in sheets:
+        if sheet is None or elem.get('name') == sheet:
+            target = elem.get(_REL + 'id')
+            break
+    if target is None:
+        raise KeyError('no sheet named {!r}'.format(sheet))
+    rels = parse(archive.open('xl/_rels/workbook.xml.rels')).getroot()
+    for rel in rels.iter(_PKG_REL + 'Relationship'):
+        if rel.get('Id') == target:
+            path = rel.get('Target')
+            if path.startswith('/'):
+                return path[1:]
+            return posixpath.normpath(posixpath.join('xl', path))
+    raise KeyError('sheet {!r} not found in workbook'.format(sheet))
+
+def _shared_strings(archive):
+    try:
+        f = archive.open('xl/sharedStrings.xml')
+    except KeyError:
+        return []
+    strings = []
+    with f:
+        for event, elem in iterparse(f):
+            if elem.tag == _XLSX + 'si':
+                strings.append(_xlsx_text(elem))
+                elem.clear()
+    return strings
+
+def _xlsx_text(elem):
+    # plain or rich text (split into runs); phonetic hints (rPh) are skipped
+    text = ''
+    for child in elem:
+        if child.tag == _XLSX + 't':
+            text += child.text or ''
+        elif child.tag == _XLSX + 'r':
+            text += ''.join(t.text or '' for t in child.iter(_XLSX + 't'))
+    return text
+
+def _column_index(ref):
+    index = 0
+    for char in _CELL_REF.match(ref).group(1):
+        index = index * 26 + ord(char) - ord('A') + 1
+    return index - 1
+
+def _xlsx_value(cell, strings):
+    kind = cell.get('t', 'n')
+    if kind == 'inlineStr':
+        inline = cell.find(_XLSX + 'is')
+        return '' if inline is None else _xlsx_text(inline)
+    v = cell.find(_XLSX + 'v')
+    if v is None or v.text is None:
+        return ''
+    if kind == 's':
+        return strings[int(v.text)]
+    if kind == 'n':
+        return _number(v.text)
+    if kind == 'b':
+        return v.text == '1'
+    return v.text #'str' (formula result), 'e' (error), 'd' (iso date)
+
+
+# ods
+
+_TABLE = '{urn:oasis:names:tc:opendocument:xmlns:table:1.0}'
+_OFFICE = '{urn:oasis:names:tc:opendocument:xmlns:office:1.0}'
+_TEXT = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+
+def _ods_lines(path, sheet=None):
+    with zipfile.ZipFile(path) as archive:
+        with archive.open('content.xml') as f:
+            table = None
+            blank = 0 #empty rows, only yielded in front of a row with values
+            for event, elem in iterparse(f, events=('start', 'end')):
+                if elem.tag == _TABLE + 'table':
+                    if event == 'start' and table is None and (sheet is None or elem.get(_TABLE + 'name') == sheet):
+                        table = elem
+                    elif event == 'end' and elem is table:
+                        return
+                    continue
+                if event != 'end' or elem.tag != _TABLE + 'table-row':
+                    continue
+                if table is None:
+                    elem.clear()
+                    continue
+                line = []
+                empty = 0 #empty cells are only added in front of a value
+                for cell in elem:
+                    if cell.tag not in (_TABLE + 'table-cell', _TABLE + 'covered-table-cell'):
+                        continue
+                    repeat = int(cell.get(_TABLE + 'number-columns-repeated', 1))
+                    value = _ods_value(cell)
+                    if value == '':
+                        empty += repeat
+                    else:
+                        line.extend([''] * empty + [value] * repeat)
+                        empty = 0
+                rows = int(elem.get(_TABLE + 'number-rows-repeated', 1))
+                elem.clear()
+                # empty rows are yielded anyway to keep the line numbers, but
+                # not the (huge) repeated block at the end of the sheet
+                if not line:
+                    blank += rows
+                    continue
+                for _ in range(blank):
+                    yield []
+                blank = 0
+                for _ in range(rows):
+                    yield line
+    if sheet is not None and table is None:
+        raise KeyError('no sheet named {!r}'.format(sheet))
+
+def _ods_value(cell):
+    kind = cell.get(_OFFICE + 'value-type')
+    if kind in ('float', 'percentage', 'currency'):
+        return _number(cell.get(_OFFICE + 'value'))
+    if kind == 'boolean':
+        return cell.get(_OFFICE + 'boolean-value') == 'true'
+    paragraphs = []
+    for p in cell.iter(_TEXT + 'p'):
+        paragraphs.append(_ods_text(p))
+    return '\n'.join(paragraphs)
+
+def _ods_text(elem):
+    text = elem.text or ''
+    for child in elem:
+        if child.tag == _TEXT + 's':
+            text += ' ' * int(child.get(_TEXT + 'c', 1))
+        elif child.tag == _TEXT + 'tab':
+            text += '\t'
+        elif child.tag == _TEXT + 'line-break':
+            text += '\n'
+        else:
+            text += _ods_text(child)
+        text += child.tail or ''
+    return text
+
+
+# writing
+
+def write_rows(path, rows, extra_columns=(), sheet='Sheet1'):
+    # writes the header (COLUMNS and extra_columns) and a line per Row as
+    # .xlsx or .csv
+    header = list(COLUMNS) + list(extra_columns)
+
+    def lines():
+        yield header
+        for row in rows:
+            extra = row.extra or {}
+            yield [getattr(row, name) for name in COLUMNS.values()] + [extra.get(c, '') for c in extra_columns]
+
+    write_lines(path, lines(), sheet)
+
+def write_lines(path, lines, sheet='Sheet1'):
+    if os.path.splitext(str(path))[1].lower() == '.csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows(lines)
+    else:
+        _write_xlsx(path, lines, sheet)
+
+
+_XLSX_FILES = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name={} sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+# characters xml 1.0 doesn't allow
+_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def _write_xlsx(path, lines, sheet):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_FILES.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', _WORKBOOK.format(quoteattr(sheet)))
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as f:
+            f.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            for number, line in enumerate(lines, 1):
+                cells = ''.join(
+                    _xlsx_cell(_column_name(index) + str(number), value)
+                    for index, value in enumerate(line) if value not in ('', None)
+                )
+                f.write('<row r="{}">{}</row>'.format(number, cells).encode('utf-8'))
+            f.write(b'</sheetData></worksheet>')
+
+def _xlsx_cell(ref, value):
+    if isinstance(value, bool):
+        return '<c r="{}" t="b"><v>{}</v></c>'.format(ref, int(value))
+    if isinstance(value, (int, float)):
+        return '<c r="{}"><v>{!r}</v></c>'.format(ref, value)
+    return '<c r="{}" t="inlineStr"><is><t xml:space="preserve">{}</t></is></c>'.format(
+        ref, escape(_ILLEGAL.sub('', str(value)))
+    )
+
+def _column_name(index):
+    name = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        name = chr(ord('A') + rest) + name
+    return name
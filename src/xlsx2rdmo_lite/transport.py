@@ -0,0 +1,170 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from .log import log
+
+# HTTP transport for the RDMO API with the methods of rdmo_client.Client the
+# importer uses (list_*, create_*, update_*, destroy_*). All requests share
+# one session, so connections are pooled and kept alive. Requests, which
+# fail with a connection error or a temporary server error, are retried with
+# jittered exponential backoff; and the request rate can be limited, to not
+# overload a shared instance.
+
+# kind -> endpoint
+ENDPOINTS = {
+    'attribute': 'api/v1/domain/attributes/',
+    'catalog': 'api/v1/questions/catalogs/',
+    'section': 'api/v1/questions/sections/',
+    'page': 'api/v1/questions/pages/',
+    'questionset': 'api/v1/questions/questionsets/',
+    'question': 'api/v1/questions/questions/',
+    'optionset': 'api/v1/options/optionsets/',
+    'option': 'api/v1/options/options/',
+}
+
+# status codes worth another try (rate limited, gateway errors, restarts)
+RETRY_STATUS = (429, 502, 503, 504)
+
+# retried after a timeout or a retryable status as well; a POST might have
+# created the element already, so it's only retried if it never reached the
+# server
+IDEMPOTENT = ('GET', 'PUT', 'DELETE')
+
+# characters of an error response added to the error (RDMO explains a 400 in
+# the body; html error pages are cut short)
+ERROR_BODY = 1000
+
+
+def error_message(error, text):
+    message = str(error).split('\n', 1)[0] #httpx adds a line with a link
+    text = (text or '').strip()
+    if len(text) > ERROR_BODY:
+        text = text[:ERROR_BODY] + '...'
+    return '{}: {}'.format(message, text) if text else message
+
+
+class RateLimiter:
+    # token bucket: at most `rate` requests per second on average, bursts of
+    # up to `burst` requests; shared by all threads
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    def reserve(self):
+        # takes a token; returns the seconds to wait before using it
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+
+
+class Client:
+    def __init__(self, base_url, auth=None, token=None, timeout=(5, 60), retries=3,
+                 backoff=0.5, max_backoff=30, rate_limit=None, pool_size=10):
+        # timeout: seconds to connect and to wait for the response
+        # retries: additional tries of a failed request
+        # backoff: base of the exponential backoff in seconds
+        # rate_limit: maximum number of requests per second, or None
+        # pool_size: connections kept alive, at least the number of parallel requests
+        self.base_url = base_url.rstrip('/') + '/'
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiter = None if not rate_limit else RateLimiter(rate_limit, burst=pool_size)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Accept'] = 'application/json'
+        if token is not None: #preferring token over basic auth
+            self.session.headers['Authorization'] = 'Token ' + token
+        elif auth:
+            self.session.auth = tuple(auth)
+
+    def close(self):
+        self.session.close()
+
+    def __getattr__(self, name):
+        # list_<plural>(**params), create_<kind>(data), update_<kind>(pk, data)
+        # and destroy_<kind>(pk) for every kind in ENDPOINTS
+        action, _, kind = name.partition('_')
+        if action == 'list':
+            kind = next((k for k in ENDPOINTS if kind == k + 's'), None)
+        if kind not in ENDPOINTS or action not in ('list', 'create', 'update', 'destroy'):
+            raise AttributeError(name)
+        url = ENDPOINTS[kind]
+        if action == 'list':
+            return lambda **params: self.request('GET', url, params=params)
+        if action == 'create':
+            return lambda data: self.request('POST', url, json=data)
+        if action == 'update':
+            return lambda pk, data: self.request('PUT', '{}{}/'.format(url, pk), json=data)
+        return lambda pk: self.request('DELETE', '{}{}/'.format(url, pk))
+
+    def request(self, method, url, **kwargs):
+        url = self.base_url + url
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.wait()
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except requests.ConnectionError as e:
+                # a refused connection never reached the server, a dropped one might have
+                reason = getattr(e.args[0], 'reason', None) if e.args else None
+                reached = not isinstance(e, requests.ConnectTimeout) and not isinstance(
+                    reason, (ConnectTimeoutError, NewConnectionError))
+                if not self._retry(attempt, method, url, e, reached):
+                    raise
+            except requests.Timeout as e:
+                if not self._retry(attempt, method, url, e, reached=True):
+                    raise
+            else:
+                # 429: rejected before processing, so even a POST can be repeated
+                if response.status_code not in RETRY_STATUS or not self._retry(
+                        attempt, method, url, response.status_code, response.status_code != 429, response):
+                    try:
+                        response.raise_for_status()
+                    except requests.HTTPError as e:
+                        raise requests.HTTPError(error_message(e, response.text), response=response) from None
+                    return response.json() if response.content else None
+            attempt += 1
+
+    def _retry(self, attempt, method, url, error, reached, response=None):
+        # sleeps before the next try and returns True, or returns False
+        delay = self._backoff(attempt, method, url, error, reached, response)
+        if delay is None:
+            return False
+        time.sleep(delay)
+        return True
+
+    def _backoff(self, attempt, method, url, error, reached, response=None):
+        # seconds to wait before the next try, or None
+        if attempt >= self.retries or (reached and method not in IDEMPOTENT):
+            return None
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)) #full jitter
+        if response is not None:
+            try:
+                delay = max(delay, float(response.headers.get('Retry-After', 0)))
+            except ValueError:
+                pass #http date instead of seconds
+        log.warning('%s %s failed (%s), retry %d of %d in %.1f s', method, url, error, attempt + 1, self.retries, delay)
+        return delay
+
@@ -0,0 +1,184 @@
+from collections import namedtuple
+
+from .keys import option_key, optionset_key, row_keys, slug, truncation
+from .model import OPTION_WIDGETS, VALUE_TYPES, WIDGET_TYPES, build_model, parse_options
+from .spreadsheet import OPTIONS_SHEET, read_options, read_rows
+
+# Checks of the sheet before anything is sent to RDMO. The rows are checked
+# in the same pass that builds the model (Validator.check wraps the rows),
+# so validating costs no extra read of the sheet; the keys derived for the
+# checks are the memoized ones the model uses right after.
+
+# columns, which must not be empty
+NAMES = ('catalog', 'section', 'questionset', 'frage_de')
+
+Issue = namedtuple('Issue', ['path', 'line', 'column', 'message', 'level'])
+
+
+class Report:
+    def __init__(self, issues=None):
+        self.issues = list(issues or [])
+
+    def add(self, path, line, column, message, level='error'):
+        self.issues.append(Issue(path, line, column, message, level))
+
+    def extend(self, other):
+        self.issues.extend(other.issues)
+        return self
+
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if issue.level == 'error']
+
+    @property
+    def warnings(self):
+        return [issue for issue in self.issues if issue.level == 'warning']
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def __iter__(self):
+        return iter(self.issues)
+
+    def __len__(self):
+        return len(self.issues)
+
+    def __str__(self):
+        return '\n'.join(
+            '{}{}: {}: {}{}'.format(
+                issue.path, '' if issue.line is None else ':{}'.format(issue.line), issue.level, issue.message,
+                '' if issue.column is None else ' (column {})'.format(issue.column),
+            )
+            for issue in self.issues
+        )
+
+
+class ValidationError(ValueError):
+    def __init__(self, report):
+        super().__init__('{} error(s) in the sheet:\n{}'.format(
+            len(report.errors), Report(report.errors)
+        ))
+        self.report = report
+
+
+class Validator:
+    def __init__(self, path=None, report=None, complete=True):
+        # complete: the rows are the whole sheet, not only the changed ones,
+        # so option sets without options can be told apart
+        self.path = str(path)
+        self.report = Report() if report is None else report
+        self.complete = complete
+        # key -> (line, names the key was derived from)
+        self.seen = {'catalog': {}, 'section': {}, 'questionset': {}, 'question': {}, 'optionset': {}, 'option': {}}
+        self.options = {} #optionset key -> (line, options) of the first row listing them
+        self.used = {} #optionset key -> (line, name) of the first question using it
+
+    def check(self, rows):
+        # yields the rows, while recording their issues
+        for row in rows:
+            self.check_row(row)
+            yield row
+        if self.complete:
+            for key, (line, name) in self.used.items():
+                if key not in self.options:
+                    self.report.add(self.path, line, 'optionset', 'optionset {!r} has no options'.format(name))
+
+    def check_options(self, options):
+        # yields the OptionRows of the options sheet, while recording their issues
+        path = '{}[{}]'.format(self.path, OPTIONS_SHEET)
+        for option in options:
+            name, text_de = str(option.optionset).strip(), str(option.text_de).strip()
+            for column, value in (('optionset', name), ('option_de', text_de)):
+                if value == '':
+                    self.report.add(path, option.line, column, 'empty {}'.format(column))
+            if name and text_de:
+                self._check_key('optionset', optionset_key(name), (name,), option.line, 'optionset', path)
+                self._check_key('option', option_key(name, text_de), (name, text_de), option.line, 'option_de', path)
+                self.options.setdefault(optionset_key(name), (option.line, None))
+            yield option
+
+    def check_row(self, row):
+        add = lambda column, message, level='error': self.report.add(self.path, row.line, column, message, level)
+        empty = [column for column in NAMES if str(getattr(row, column)).strip() == '']
+        for column in empty:
+            add(column, 'empty {}'.format(column))
+        question = row.widgettype in WIDGET_TYPES
+        if not question:
+            add('widgettype', 'unsupported widgettype {!r}, the question is skipped'.format(row.widgettype), 'warning')
+        elif str(row.valuetype).strip() not in ('',) + VALUE_TYPES:
+            add('valuetype', 'unknown valuetype {!r}'.format(row.valuetype))
+        optionset_name = str(row.optionset or row.options).strip()
+        if question and row.widgettype in OPTION_WIDGETS and not optionset_name:
+            add('optionset', 'widgettype {!r} needs an optionset or options'.format(row.widgettype))
+        if empty:
+            return
+        keys = row_keys(row)
+        # every name is part of the keys on its own, the section alone is the
+        # key of the section attribute
+        slugs = {'catalog': slug(row.catalog), 'section': keys.section_attribute,
+                 'questionset': slug(row.questionset), 'frage_de': slug(row.frage_de)}
+        unusable = [column for column in NAMES if slugs[column] == '']
+        for column in unusable:
+            add(column, 'the {} {!r} has no letters or digits to derive a key from'.format(column, getattr(row, column)))
+        if unusable:
+            return
+        if question and optionset_name:
+            self._check_optionset(row, optionset_name)
+
+        checks = [
+            ('catalog', keys.catalog, (row.catalog,), 'catalog'),
+            ('section', keys.section, (row.catalog, row.section), 'section'),
+            ('questionset', keys.questionset, (row.catalog, row.section, row.questionset), 'questionset'),
+        ]
+        if question:
+            checks.append(('question', keys.question, (row.section, row.questionset, row.frage_de), 'frage_de'))
+        for kind, key, names, column in checks:
+            self._check_key(kind, key, names, row.line, column)
+
+    def _check_optionset(self, row, name):
+        key = optionset_key(name)
+        self.used.setdefault(key, (row.line, name))
+        if not self._check_key('optionset', key, (name,), row.line, 'optionset'):
+            return
+        options = parse_options(row.options)
+        for text_de, text_en in options:
+            self._check_key('option', option_key(name, text_de), (name, text_de), row.line, 'options')
+        if options:
+            first = self.options.setdefault(key, (row.line, options))
+            if first[1] is not None and first[1] != options:
+                self.report.add(self.path, row.line, 'options', 'the options of optionset {!r} differ from line {}, '
+                                'the optionset gets all of them'.format(name, first[0]), 'warning')
+
+    def _check_key(self, kind, key, names, line, column, path=None):
+        # records the names a key was derived from; False if the key is unusable
+        add = lambda message: self.report.add(path or self.path, line, column, message)
+        if key.strip('-') in ('', 'catalog', 'page', 'question', 'optionset', 'option'):
+            add('the {} has no letters or digits to derive a key from'.format(kind))
+            return False
+        seen = self.seen[kind].get(key)
+        if seen is None:
+            self.seen[kind][key] = (line, names)
+        elif kind == 'question' and seen[1] == names:
+            add('duplicate question (line {}), the row is skipped'.format(seen[0]))
+        elif seen[1] != names:
+            add('{} {!r} collides with line {}: both get the key {!r} after slugifying{}'.format(
+                kind, names[-1], seen[0], key, truncation(kind, names),
+            ))
+            return False
+        return True
+
+
+def check_model(path):
+    # top-level, so it can run in worker processes; returns the model and
+    # the report of the sheet
+    validator = Validator(path)
+    try:
+        model = build_model(validator.check(read_rows(path)), validator.check_options(read_options(path)))
+    except ValueError as e: #missing columns
+        validator.report.add(str(path), 1, None, str(e))
+        model = None
+    return model, validator.report
+
+def validate(path):
+    return check_model(path)[1]
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+# the tests run against the sources, without installing the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from xlsx2rdmo_lite import xlsx2rdmo_lite
+from xlsx2rdmo_lite.fake import FakeRDMO
+from xlsx2rdmo_lite.spreadsheet import write_lines
+
+HEADER = [0, 1, 2, 'frage_de', 'frage_en', 'widgettype']
+
+ROWS = [
+    ['Catalog', 'Section 1', 'Set 1', 'First question', 'first', 'text'],
+    ['Catalog', 'Section 1', 'Set 1', 'Second question', 'second', 'textarea'],
+    ['Catalog', 'Section 1', 'Set 2', 'Third question', 'third', 'yesno'],
+    ['Catalog', 'Section 2', 'Set 3', 'Fourth question', 'fourth', 'text'],
+]
+
+
+@pytest.fixture
+def sheet(tmp_path):
+    # writes rows (with the header) as a workbook in tmp_path
+    def write(rows=ROWS, name='catalog.xlsx'):
+        path = str(tmp_path / name)
+        write_lines(path, [HEADER] + [list(row) for row in rows])
+        return path
+    return write
+
+@pytest.fixture
+def rdmo():
+    return FakeRDMO()
+
+@pytest.fixture
+def importer(rdmo):
+    # a new importer per call, all on the same instance
+    def make(**kwargs):
+        kwargs.setdefault('verbose', False)
+        kwargs.setdefault('journal', False)
+        importer = xlsx2rdmo_lite(**kwargs)
+        importer.init_rdmo_access('http://rdmo.example', client=rdmo)
+        return importer
+    return make
+
+def writes(rdmo):
+    return [request for request in rdmo.requests if request[0] != 'list']
@@ -0,0 +1,96 @@
+import asyncio
+import os
+
+import pytest
+
+from xlsx2rdmo_lite.async_transport import AsyncClient
+from xlsx2rdmo_lite.fake import AsyncFakeRDMO, FakeRDMO
+from xlsx2rdmo_lite.journal import journal_path
+
+from conftest import ROWS, writes
+from test_executor import rows, structure
+from test_transport import server #noqa: F401 (fixture)
+
+
+class Crashing(AsyncFakeRDMO):
+    # fails after a number of writes, like a server going away mid-import
+    def __init__(self, writes, **kwargs):
+        super().__init__(**kwargs)
+        self.left = writes
+
+    def _handle(self, action, kind, method, *args, **kwargs):
+        if action != 'list' and self.left is not None:
+            if self.left == 0:
+                raise ConnectionError('server gone')
+            self.left -= 1
+        return super()._handle(action, kind, method, *args, **kwargs)
+
+
+def synchronous(rdmo):
+    # the elements of an AsyncFakeRDMO behind the methods of the sync client
+    fake = FakeRDMO()
+    fake.elements, fake.unique, fake.ids = rdmo.elements, rdmo.unique, rdmo.ids
+    return fake
+
+
+def test_async_import_matches_sync(sheet, importer):
+    path = sheet(ROWS + rows(30))
+    sequential = FakeRDMO()
+    importer_ = importer()
+    importer_.init_rdmo_access('http://rdmo.example', client=sequential)
+    importer_.import_to_rdmo(path)
+
+    rdmo = AsyncFakeRDMO(latency=(0, 0.002), seed=3)
+    plan = asyncio.run(importer(concurrency=8).import_to_rdmo_async(path, client=rdmo))
+    assert plan.totals()['created'] > 0
+    assert structure(rdmo) == structure(sequential)
+
+    # nothing left to change on a second import
+    del rdmo.requests[:]
+    plan = asyncio.run(importer(concurrency=8).import_to_rdmo_async(path, client=rdmo))
+    assert len(plan) == 0
+    assert writes(rdmo) == []
+
+def test_failed_async_import_is_resumed(sheet, importer):
+    path = sheet()
+    rdmo = Crashing(writes=5)
+    with pytest.raises(ConnectionError):
+        asyncio.run(importer(journal=True, concurrency=4).import_to_rdmo_async(path, client=rdmo))
+    assert os.path.exists(journal_path(path))
+
+    resumed = importer(journal=True)
+    resumed.init_rdmo_access('http://rdmo.example', client=synchronous(rdmo))
+    resumed.import_to_rdmo(path, resume=True)
+    assert not os.path.exists(journal_path(path))
+    # nothing was created twice, and the import is complete
+    assert len(rdmo.elements['question']) == 4
+    assert len(resumed.plan(path)) == 0
+
+async def send(client, method, *args):
+    async with client:
+        return await getattr(client, method)(*args)
+
+def test_async_client_retries_like_the_sync_client(server, monkeypatch):
+    httpx = pytest.importorskip('httpx')
+    delays = []
+    async def sleep(delay):
+        delays.append(delay)
+    monkeypatch.setattr('xlsx2rdmo_lite.async_transport.asyncio.sleep', sleep)
+    server.answer(503)
+    server.answer(429, **{'Retry-After': '7'})
+    server.answer(200, [{'id': 1}])
+    assert asyncio.run(send(AsyncClient(server.url, backoff=0.01), 'list_catalogs')) == [{'id': 1}]
+    assert len(delays) == 2 and delays[1] == 7.0
+
+    server.answer(503)
+    with pytest.raises(httpx.HTTPStatusError) as error:
+        asyncio.run(send(AsyncClient(server.url), 'create_catalog', {'uri_path': 'c'}))
+    assert '503' in str(error.value)
+    assert len(server.requests) == 4 #the POST was sent once
+
+def test_async_client_keeps_the_error_body(server):
+    httpx = pytest.importorskip('httpx')
+    server.answer(400, {'uri_path': ['catalog with this uri_path already exists.']})
+    with pytest.raises(httpx.HTTPStatusError) as error:
+        asyncio.run(send(AsyncClient(server.url), 'create_catalog', {'uri_path': 'c'}))
+    assert 'already exists' in str(error.value)
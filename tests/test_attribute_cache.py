@@ -0,0 +1,66 @@
+import sqlite3
+
+import pytest
+
+from xlsx2rdmo_lite.attribute_cache import shared_attributes
+from xlsx2rdmo_lite.validate import ValidationError
+
+from conftest import ROWS, writes
+
+LONG = 'what is the long and winding question of this section ' * 2
+
+
+def question(catalog, ending):
+    return [[catalog, 'Section', 'Set', LONG + ending, '', 'text']]
+
+
+def test_catalogs_share_attributes_with_the_same_names(sheet, importer, rdmo, tmp_path):
+    cache = str(tmp_path / 'attributes.sqlite')
+    importer(attribute_cache=cache).import_to_rdmo(sheet(question('First', 'one'), 'first.xlsx'))
+    importer(attribute_cache=cache).import_to_rdmo(sheet(question('Second', 'one'), 'second.xlsx'))
+    assert len(rdmo.elements['catalog']) == 2
+    assert len(rdmo.elements['question']) == 1
+
+def test_collision_with_a_recorded_catalog(sheet, importer, rdmo, tmp_path):
+    cache = str(tmp_path / 'attributes.sqlite')
+    importer(attribute_cache=cache).import_to_rdmo(sheet(question('First', 'one'), 'first.xlsx'))
+    sent = len(writes(rdmo))
+    with pytest.raises(ValidationError) as error:
+        importer(attribute_cache=cache).import_to_rdmo(sheet(question('Second', 'two'), 'second.xlsx'))
+    assert len(writes(rdmo)) == sent
+    issue, = error.value.report.errors
+    assert issue.column == 'frage_de'
+    assert 'of catalog-first' in issue.message
+    assert 'truncating frage_de to 100 characters' in issue.message
+    assert 'second.xlsx: error:' in str(error.value.report) #no empty line number
+
+def test_collision_between_workbooks_without_a_cache(sheet, importer, rdmo):
+    paths = [sheet(question('First', 'one'), 'first.xlsx'), sheet(question('Second', 'two'), 'second.xlsx')]
+    with pytest.raises(ValidationError) as error:
+        importer().import_many(paths, processes=1)
+    assert len(error.value.report.errors) == 2
+    assert writes(rdmo) == []
+    # the same names in both are shared
+    paths = [sheet(question('First', 'one'), 'first.xlsx'), sheet(question('Second', 'one'), 'second.xlsx')]
+    importer().import_many(paths, processes=1)
+    assert len(rdmo.elements['catalog']) == 2
+
+def test_attributes_gone_from_the_server_are_dropped(sheet, importer, rdmo, tmp_path):
+    cache = str(tmp_path / 'attributes.sqlite')
+    importer(attribute_cache=cache).import_to_rdmo(sheet(question('First', 'one'), 'first.xlsx'))
+    importer().delete('First')
+    # the recorded names of the deleted catalog don't block another catalog
+    importer(attribute_cache=cache).import_to_rdmo(sheet(question('Second', 'two'), 'second.xlsx'))
+    with sqlite3.connect(cache) as connection:
+        catalogs = [row[0] for row in connection.execute('SELECT catalog FROM attributes')]
+    assert catalogs == ['catalog-second']
+
+def test_unchanged_entries_are_not_written_again(sheet, importer, tmp_path):
+    cache = str(tmp_path / 'attributes.sqlite')
+    path = sheet(ROWS)
+    importer_ = importer(attribute_cache=cache)
+    importer_.import_to_rdmo(path)
+    entries = list(shared_attributes(importer_.model, path))
+    assert importer_._attributes().record(entries, importer_.state) == 0
+    with sqlite3.connect(cache) as connection:
+        assert connection.execute('SELECT COUNT(*) FROM attributes').fetchone()[0] == len(ROWS)
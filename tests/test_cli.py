@@ -0,0 +1,86 @@
+import pytest
+
+from xlsx2rdmo_lite import xlsx2rdmo_lite
+from xlsx2rdmo_lite.cli import main
+from xlsx2rdmo_lite.fake import FakeRDMO
+
+from conftest import ROWS
+
+
+@pytest.fixture
+def terminal(monkeypatch):
+    # an interactive stdin, answering prompts with the given text
+    def answer(text):
+        monkeypatch.setattr('sys.stdin.isatty', lambda: True)
+        monkeypatch.setattr('builtins.input', lambda prompt: text)
+    return answer
+
+@pytest.fixture
+def connect(monkeypatch):
+    # records the credentials and connects to a FakeRDMO instead of the url
+    calls = []
+    init = xlsx2rdmo_lite.init_rdmo_access
+
+    def init_rdmo_access(self, base_url, auth=None, token=None, **kwargs):
+        calls.append((auth, token))
+        kwargs['client'] = FakeRDMO()
+        return init(self, base_url, auth=auth, token=token, **kwargs)
+    monkeypatch.setattr(xlsx2rdmo_lite, 'init_rdmo_access', init_rdmo_access)
+    return calls
+
+
+def test_validate(sheet, capsys):
+    assert main(['validate', sheet()]) == 0
+    assert main(['validate', sheet([ROWS[0], ROWS[0]], 'duplicate.xlsx')]) == 1
+    assert 'duplicate question' in capsys.readouterr().out
+
+def test_plan_prints_the_operations(sheet, capsys):
+    assert main(['plan', 'http://rdmo.example', sheet(), '--fake', '--quiet']) == 0
+    out = capsys.readouterr().out
+    assert out.count('create question ') == len(ROWS)
+
+def test_import_is_the_default_command(sheet):
+    assert main(['http://rdmo.example', sheet(), '--fake', '--quiet']) == 0
+
+def test_credentials_are_required(sheet, monkeypatch):
+    monkeypatch.delenv('RDMO_TOKEN', raising=False)
+    with pytest.raises(SystemExit) as exit:
+        main(['import', 'http://rdmo.example', sheet()])
+    assert exit.value.code == 2
+
+def test_user_without_password(sheet, monkeypatch, connect):
+    monkeypatch.delenv('RDMO_TOKEN', raising=False)
+    monkeypatch.delenv('RDMO_PASSWORD', raising=False)
+    with pytest.raises(SystemExit) as exit: #not interactive
+        main(['plan', 'http://rdmo.example', sheet(), '--user', 'admin', '--quiet'])
+    assert exit.value.code == 2
+    assert connect == []
+
+    monkeypatch.setattr('sys.stdin.isatty', lambda: True)
+    monkeypatch.setattr('getpass.getpass', lambda prompt: 'secret')
+    assert main(['plan', 'http://rdmo.example', sheet(), '--user', 'admin', '--quiet']) == 0
+    assert connect == [(('admin', 'secret'), None)]
+
+def test_delete_all_needs_confirmation(capsys, terminal):
+    with pytest.raises(SystemExit) as exit: #not interactive
+        main(['delete', 'http://rdmo.example', '--all', '--fake', '--quiet'])
+    assert exit.value.code == 2
+
+    terminal('n')
+    assert main(['delete', 'http://rdmo.example', '--all', '--fake', '--quiet']) == 1
+    assert 'nothing deleted' in capsys.readouterr().err
+    terminal('y')
+    assert main(['delete', 'http://rdmo.example', '--all', '--fake', '--quiet']) == 0
+
+def test_delete_all_with_yes():
+    assert main(['delete', 'http://rdmo.example', '--all', '--yes', '--fake', '--quiet']) == 0
+
+def test_unknown_catalog(capsys):
+    assert main(['delete', 'http://rdmo.example', '--catalog', 'Nothing', '--fake', '--quiet']) == 1
+    assert 'catalog not found' in capsys.readouterr().err
+
+def test_xml(sheet, tmp_path):
+    out = str(tmp_path / 'catalog.xml')
+    assert main(['xml', sheet(), out, '--uri-prefix', 'https://rdmo.example/terms', '--quiet']) == 0
+    assert main(['xml', sheet([ROWS[0], ROWS[0]], 'duplicate.xlsx'), out + '2',
+                 '--uri-prefix', 'https://rdmo.example/terms', '--quiet']) == 1
@@ -0,0 +1,64 @@
+from conftest import ROWS
+
+
+def shared_rows(catalog):
+    # the same sections, questionsets and questions as ROWS, so the catalogs
+    # share their attributes and questions
+    return [[catalog] + row[1:] for row in ROWS]
+
+def titles(rdmo, kind):
+    return sorted(element.get('title_en', element.get('key')) for element in rdmo.elements[kind].values())
+
+
+def test_delete_keeps_elements_of_other_catalogs(sheet, importer, rdmo):
+    importer().import_to_rdmo(sheet(shared_rows('First'), 'first.xlsx'))
+    importer().import_to_rdmo(sheet(shared_rows('Second'), 'second.xlsx'))
+    questions = dict(rdmo.elements['question'])
+    attributes = dict(rdmo.elements['attribute'])
+    assert len(questions) == len(ROWS) #shared
+
+    plan = importer().delete('First')
+    assert plan.totals()['destroyed'] > 0
+    assert titles(rdmo, 'catalog') == ['Second']
+    assert rdmo.elements['question'].keys() == questions.keys()
+    assert rdmo.elements['attribute'].keys() == attributes.keys()
+    # the second catalog is still complete
+    assert len(importer().plan(sheet(shared_rows('Second'), 'second.xlsx'))) == 0
+
+def test_delete_destroys_what_only_the_catalog_uses(sheet, importer, rdmo):
+    importer().import_to_rdmo(sheet(shared_rows('First'), 'first.xlsx'))
+    rows = [['Second', 'Other section', 'Other set', 'Other question', 'other', 'text']]
+    importer().import_to_rdmo(sheet(rows, 'second.xlsx'))
+
+    importer().delete('Second')
+    assert titles(rdmo, 'catalog') == ['First']
+    assert 'Other question' not in [q['text_de'] for q in rdmo.elements['question'].values()]
+    assert not any('other' in a['path'] for a in rdmo.elements['attribute'].values())
+    assert len(importer().plan(sheet(shared_rows('First'), 'first.xlsx'))) == 0
+
+def test_delete_by_uri_path(sheet, importer, rdmo):
+    importer().import_to_rdmo(sheet())
+    uri_path = next(iter(rdmo.elements['catalog'].values()))['uri_path']
+    importer().delete(uri_path)
+    assert rdmo.elements['catalog'] == {}
+
+def test_delete_everything(sheet, importer, rdmo):
+    importer().import_to_rdmo(sheet(shared_rows('First'), 'first.xlsx'))
+    importer().import_to_rdmo(sheet(shared_rows('Second'), 'second.xlsx'))
+    importer().delete()
+    assert all(elements == {} for elements in rdmo.elements.values())
+
+def test_delete_everything_of_every_uri_prefix(sheet, importer, rdmo):
+    path = sheet()
+    importer().import_to_rdmo(path)
+    other = importer()
+    other.init_rdmo_access('http://rdmo.example', uri_prefix='https://other.example/terms', client=rdmo)
+    other.import_to_rdmo(path)
+    assert len(rdmo.elements['catalog']) == 2
+
+    importer_ = importer()
+    plan = importer_.delete()
+    assert all(elements == {} for elements in rdmo.elements.values())
+    assert plan.totals()['destroyed'] > 0
+    # descendants deleted along with their attribute are gone from the state
+    assert list(importer_.state.attributes) == []
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from xlsx2rdmo_lite.executor import Executor, dependencies
+from xlsx2rdmo_lite.fake import MEMBERSHIPS, REFERENCES, FakeRDMO
+
+from conftest import ROWS
+
+
+def rows(n):
+    # n questions in a few sections and questionsets, so many operations are
+    # independent of each other
+    return [
+        ['Catalog', 'Section {}'.format(i % 3), 'Set {}'.format(i % 7), 'Question {}'.format(i), '', 'text']
+        for i in range(n)
+    ]
+
+def structure(rdmo):
+    # the elements by uri_path (attributes by path), with the ids they refer
+    # to replaced by those, to compare instances
+    names = {
+        kind: {element['id']: element.get('path', element.get('uri_path')) for element in elements.values()}
+        for kind, elements in rdmo.elements.items()
+    }
+    result = {}
+    for kind, elements in rdmo.elements.items():
+        for element in elements.values():
+            name = names[kind][element['id']]
+            element = {field: value for field, value in element.items() if field not in ('id', 'uri')}
+            for field, ref_kind in REFERENCES.get(kind, {}).items():
+                value = element.get(field)
+                if isinstance(value, list):
+                    element[field] = [names[ref_kind][ref] for ref in value]
+                else:
+                    element[field] = names[ref_kind].get(value)
+            for field, member_kind in MEMBERSHIPS.get(kind, {}).items():
+                element[field] = [(names[member_kind][f[member_kind]], f['order']) for f in element[field]]
+            result[(kind, name)] = element
+    return result
+
+
+def test_operations_wait_for_their_dependencies(sheet, importer):
+    importer_ = importer()
+    plan = list(importer_.plan(sheet(rows(40))))
+    deps = dependencies(plan)
+    assert any(deps) and not all(deps)
+
+    index = {id(op): i for i, op in enumerate(plan)}
+    done = set()
+    started_early = []
+    lock = threading.Lock()
+
+    def on_start(op):
+        with lock:
+            if not deps[index[id(op)]] <= done:
+                started_early.append(op)
+
+    def on_done(op, obj):
+        with lock:
+            done.add(index[id(op)])
+
+    client = FakeRDMO(latency=(0, 0.002), seed=1)
+    Executor(client, importer_.state, concurrency=8, on_start=on_start, on_done=on_done).run(plan)
+    assert started_early == []
+    assert len(done) == len(plan)
+
+def test_concurrent_import_matches_sequential(sheet, importer):
+    path = sheet(ROWS + rows(30))
+    sequential, concurrent = FakeRDMO(), FakeRDMO(latency=(0, 0.002), seed=2)
+    for client, concurrency in ((sequential, 1), (concurrent, 8)):
+        importer_ = importer(concurrency=concurrency)
+        importer_.init_rdmo_access('http://rdmo.example', client=client)
+        importer_.import_to_rdmo(path)
+    assert structure(concurrent) == structure(sequential)
+
+def test_failed_operation_stops_the_import(sheet, importer):
+    class Failing(FakeRDMO):
+        def create_question(self, data):
+            raise RuntimeError('server error')
+
+    importer_ = importer(concurrency=4)
+    importer_.init_rdmo_access('http://rdmo.example', client=Failing())
+    with pytest.raises(RuntimeError, match='server error'):
+        importer_.import_to_rdmo(sheet())
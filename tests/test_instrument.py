@@ -0,0 +1,42 @@
+import json
+
+from xlsx2rdmo_lite.instrument import Metrics
+
+
+def test_requests_by_phase(sheet, importer, rdmo):
+    importer_ = importer()
+    importer_.import_to_rdmo(sheet())
+    report = importer_.metrics.report()
+    assert report['requests']['count'] == len(rdmo.requests)
+    phases = report['phases']
+    assert {'read', 'snapshot', 'plan', 'execute'} <= set(phases)
+    assert set(phases['snapshot']['calls']) == {'GET ' + kind for kind in (
+        'attributes', 'catalogs', 'sections', 'pages', 'questionsets', 'questions', 'optionsets', 'options')}
+    assert phases['execute']['calls']['POST questions']['count'] == 4
+    assert phases['plan']['requests'] == 0
+    assert sum(phase['requests'] for phase in phases.values()) == len(rdmo.requests)
+    # body sizes are only measured for a report file
+    assert 'sent' not in report['requests']
+    assert all('sent' not in stats for stats in report['requests']['calls'].values())
+
+def test_report_file_with_sizes(sheet, importer, tmp_path):
+    path = str(tmp_path / 'report.json')
+    importer(report_path=path).import_to_rdmo(sheet())
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    assert report['requests']['sent'] > 0
+    assert report['requests']['received'] > report['requests']['calls']['POST questions']['received'] > 0
+    assert len(report['slowest']) == 10
+
+def test_nested_phases_add_up():
+    metrics = Metrics()
+    with metrics:
+        for _ in range(2):
+            with metrics.phase('read'):
+                metrics.record('GET', 'catalogs', 0.5, 0, 0)
+        metrics.record('PUT', 'catalogs', 2.0, 0, 0) #outside of any phase
+    report = metrics.report()
+    assert report['phases']['read']['requests'] == 2
+    assert report['phases']['read']['calls'] == {'GET catalogs': {'count': 2, 'seconds': 1.0}}
+    assert report['requests']['count'] == 3
+    assert report['slowest'][0] == {'call': 'PUT catalogs', 'phase': None, 'seconds': 2.0}
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from xlsx2rdmo_lite.fake import FakeRDMO
+from xlsx2rdmo_lite.journal import journal_path
+
+from conftest import writes
+
+
+class Crashing(FakeRDMO):
+    # fails after a number of writes, like a server going away mid-import
+    def __init__(self, writes):
+        super().__init__()
+        self.left = writes
+
+    def _handle(self, action, kind, method, *args, **kwargs):
+        if action != 'list' and self.left is not None:
+            if self.left == 0:
+                raise ConnectionError('server gone')
+            self.left -= 1
+        return super()._handle(action, kind, method, *args, **kwargs)
+
+
+def test_resume_continues_a_failed_import(sheet, importer):
+    path = sheet()
+    rdmo = Crashing(writes=5)
+    first = importer(journal=True)
+    first.init_rdmo_access('http://rdmo.example', client=rdmo)
+    with pytest.raises(ConnectionError):
+        first.import_to_rdmo(path)
+    assert os.path.exists(journal_path(path))
+    assert len(writes(rdmo)) == 5
+
+    rdmo.left = None #back again
+    resumed = importer(journal=True)
+    resumed.init_rdmo_access('http://rdmo.example', client=rdmo)
+    plan = resumed.import_to_rdmo(path, resume=True)
+    assert plan.totals()['created'] > 0
+    assert not os.path.exists(journal_path(path))
+    # nothing was created twice, and the import is complete
+    assert len(rdmo.elements['question']) == 4
+    assert len(resumed.plan(path)) == 0
+
+def test_journal_is_removed_after_a_successful_import(sheet, importer):
+    path = sheet()
+    importer(journal=True).import_to_rdmo(path)
+    assert not os.path.exists(journal_path(path))
+
+def test_read_only_directory_uses_the_cache_dir(sheet, importer, tmp_path, monkeypatch):
+    path = sheet()
+    cache_dir = str(tmp_path / 'cache')
+    monkeypatch.setattr('xlsx2rdmo_lite.journal.os.access', lambda path, mode: False)
+    assert journal_path(path) is None
+    assert journal_path(path, cache_dir).startswith(cache_dir)
+
+    rdmo = Crashing(writes=3)
+    first = importer(journal=True, cache_dir=cache_dir)
+    first.init_rdmo_access('http://rdmo.example', client=rdmo)
+    with pytest.raises(ConnectionError):
+        first.import_to_rdmo(path)
+    assert os.path.exists(journal_path(path, cache_dir))
+
+def test_import_without_a_writable_journal(sheet, importer, rdmo, caplog):
+    path = sheet()
+    os.mkdir(journal_path(path)) #can't be opened as a file
+    plan = importer(journal=True).import_to_rdmo(path)
+    assert len(rdmo.elements['question']) == 4
+    assert plan.totals()['created'] == len(writes(rdmo))
+    assert 'importing without one' in caplog.text
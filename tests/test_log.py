@@ -0,0 +1,40 @@
+import logging
+
+import pytest
+
+from xlsx2rdmo_lite import xlsx2rdmo_lite
+from xlsx2rdmo_lite.log import log, reset
+
+
+@pytest.fixture(autouse=True)
+def clean_logger():
+    reset()
+    level, handlers = log.level, list(log.handlers)
+    yield
+    reset()
+    log.setLevel(level)
+    log.handlers[:] = handlers
+
+
+def test_verbose_shows_progress():
+    xlsx2rdmo_lite(verbose=True)
+    assert log.isEnabledFor(logging.INFO)
+    xlsx2rdmo_lite(debug=True)
+    assert log.isEnabledFor(logging.DEBUG)
+
+def test_quiet_after_verbose(monkeypatch):
+    monkeypatch.setattr(logging.getLogger(), 'level', logging.WARNING)
+    xlsx2rdmo_lite(verbose=True)
+    handlers = list(log.handlers)
+    xlsx2rdmo_lite(verbose=False)
+    assert not log.isEnabledFor(logging.INFO)
+    assert log.isEnabledFor(logging.WARNING)
+    assert len(log.handlers) <= len(handlers)
+
+def test_quiet_keeps_the_logging_of_the_application():
+    handler = logging.NullHandler()
+    log.addHandler(handler)
+    log.setLevel(logging.DEBUG)
+    xlsx2rdmo_lite(verbose=False)
+    assert log.level == logging.DEBUG
+    assert handler in log.handlers
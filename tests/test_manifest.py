@@ -0,0 +1,61 @@
+import os
+
+from xlsx2rdmo_lite.manifest import manifest_path
+
+from conftest import ROWS, writes
+
+
+def texts(rdmo):
+    return sorted(question['text_de'] for question in rdmo.elements['question'].values())
+
+
+def test_unchanged_sheet_sends_no_writes(sheet, importer, rdmo):
+    path = sheet()
+    plan = importer().import_to_rdmo(path, incremental=True)
+    assert plan.totals()['created'] == len(writes(rdmo))
+    assert os.path.exists(manifest_path(path))
+
+    sent = len(writes(rdmo))
+    plan = importer().import_to_rdmo(path, incremental=True)
+    assert len(plan) == 0
+    assert len(writes(rdmo)) == sent
+
+def test_only_changed_rows_are_planned(sheet, importer, rdmo):
+    importer().import_to_rdmo(sheet(), incremental=True)
+    rows = [list(row) for row in ROWS] + [['Catalog', 'Section 2', 'Set 3', 'Fifth question', 'fifth', 'text']]
+    rows[0][4] = 'first, changed'
+    plan = importer().plan(sheet(rows), incremental=True)
+    questions = [(op.action, op.ref) for op in plan if op.kind == 'question']
+    assert questions == [('update', 'question-section-1-set-1-first-question'),
+                         ('create', 'question-section-2-set-3-fifth-question')]
+
+def test_deleted_rows_are_kept_unless_pruned(sheet, importer, rdmo):
+    path = sheet()
+    importer().import_to_rdmo(path, incremental=True)
+    sheet(ROWS[1:])
+    importer().import_to_rdmo(path, incremental=True)
+    assert 'First question' in texts(rdmo)
+
+    importer().import_to_rdmo(path, incremental=True, prune=True)
+    assert texts(rdmo) == ['Fourth question', 'Second question', 'Third question']
+    questionset = next(qs for qs in rdmo.elements['questionset'].values() if qs['title_en'] == 'Set 1')
+    assert len(questionset['questions']) == 1
+    # pruned once
+    sent = len(writes(rdmo))
+    importer().import_to_rdmo(path, incremental=True, prune=True)
+    assert len(writes(rdmo)) == sent
+
+def test_rows_gone_from_the_server_are_imported_again(sheet, importer, rdmo):
+    path = sheet()
+    created = importer().import_to_rdmo(path, incremental=True).totals()['created']
+    importer().delete('Catalog')
+    assert rdmo.elements['question'] == {}
+    assert importer().import_to_rdmo(path, incremental=True).totals()['created'] == created
+    assert len(importer().plan(path, incremental=True)) == 0
+
+def test_manifest_of_another_server_is_ignored(sheet, importer, rdmo):
+    path = sheet()
+    importer().import_to_rdmo(path, incremental=True)
+    other = importer()
+    other.init_rdmo_access('http://other.example', client=rdmo)
+    assert other.import_to_rdmo(path, incremental=True).totals()['created'] > 0
@@ -0,0 +1,59 @@
+from conftest import ROWS, writes
+
+
+
+def test_import_creates_every_element(sheet, importer, rdmo):
+    plan = importer().import_to_rdmo(sheet())
+    assert plan.totals() == {'created': len(writes(rdmo)), 'updated': 0, 'destroyed': 0, 'unchanged': 0}
+    assert len(rdmo.elements['catalog']) == 1
+    assert len(rdmo.elements['section']) == 2
+    assert len(rdmo.elements['questionset']) == 3
+    assert len(rdmo.elements['question']) == 4
+    # section, questionset and question attributes
+    assert len(rdmo.elements['attribute']) == 2 + 3 + 4
+
+def test_unchanged_reimport_sends_no_writes(sheet, importer, rdmo):
+    path = sheet()
+    importer().import_to_rdmo(path)
+    sent = len(writes(rdmo))
+    plan = importer().import_to_rdmo(path)
+    assert len(plan) == 0
+    assert plan.totals()['unchanged'] > 0
+    assert len(writes(rdmo)) == sent
+
+def test_changed_row_is_updated(sheet, importer, rdmo):
+    importer().import_to_rdmo(sheet())
+    rows = [list(row) for row in ROWS]
+    rows[0][4] = 'first, changed'
+    plan = importer().plan(sheet(rows))
+    assert [(op.action, op.kind) for op in plan] == [('update', 'question')]
+    importer().import_to_rdmo(sheet(rows))
+    assert 'first, changed' in [q['text_en'] for q in rdmo.elements['question'].values()]
+
+def test_numeric_cells_compare_as_text(sheet, importer, rdmo):
+    rows = [['Catalog', 'Section', 'Set', 2024, 0, 'text']]
+    importer().import_to_rdmo(sheet(rows))
+    assert len(importer().plan(sheet(rows))) == 0
+
+def test_members_keep_the_order_of_the_sheet(sheet, importer, rdmo):
+    importer().import_to_rdmo(sheet())
+    questions = {element['id']: element['text_de'] for element in rdmo.elements['question'].values()}
+    questionset = next(qs for qs in rdmo.elements['questionset'].values() if qs['title_en'] == 'Set 1')
+    members = sorted(questionset['questions'], key=lambda member: member['order'])
+    assert [questions[member['question']] for member in members] == ['First question', 'Second question']
+
+    # members on the server keep their order, new ones are appended once
+    rows = [['Catalog', 'Section 1', 'Set 1', 'New question', 'new', 'text']] + ROWS
+    importer().import_to_rdmo(sheet(rows))
+    importer().import_to_rdmo(sheet(rows))
+    questions = {element['id']: element['text_de'] for element in rdmo.elements['question'].values()}
+    questionset = rdmo.elements['questionset'][questionset['id']]
+    members = sorted(questionset['questions'], key=lambda member: member['order'])
+    assert [questions[member['question']] for member in members] == ['First question', 'Second question', 'New question']
+
+def test_catalog_orders_its_sections(sheet, importer, rdmo):
+    importer().import_to_rdmo(sheet())
+    sections = {element['id']: element['title_en'] for element in rdmo.elements['section'].values()}
+    catalog = next(iter(rdmo.elements['catalog'].values()))
+    members = sorted(catalog['sections'], key=lambda member: member['order'])
+    assert [sections[member['section']] for member in members] == ['Section 1', 'Section 2']
@@ -0,0 +1,55 @@
+import os
+from xml.etree import ElementTree
+
+import pytest
+
+from xlsx2rdmo_lite import xlsx2rdmo_lite
+from xlsx2rdmo_lite.validate import ValidationError
+
+from conftest import ROWS
+
+PREFIX = 'https://rdmo.example/terms'
+DC = '{http://purl.org/dc/elements/1.1/}'
+
+
+def export(path, out):
+    importer = xlsx2rdmo_lite(verbose=False)
+    importer.export_xml(path, out, PREFIX)
+    return ElementTree.parse(out).getroot()
+
+
+def test_elements_of_the_sheet(sheet, tmp_path):
+    root = export(sheet(), str(tmp_path / 'catalog.xml'))
+    kinds = [element.tag for element in root]
+    assert kinds.count('catalog') == 1
+    assert kinds.count('section') == kinds.count('page') == 2
+    assert kinds.count('questionset') == 3
+    assert kinds.count('question') == len(ROWS)
+    assert kinds.count('attribute') == 2 + 3 + len(ROWS)
+    assert all(element.get(DC + 'uri').startswith(PREFIX + '/') for element in root)
+
+def test_references_point_to_elements_further_up(sheet, tmp_path):
+    root = export(sheet(), str(tmp_path / 'catalog.xml'))
+    written = set()
+    for element in root:
+        for ref in element.iter():
+            uri = ref.get(DC + 'uri')
+            if ref is not element and uri is not None:
+                assert uri in written
+        written.add(element.get(DC + 'uri'))
+
+def test_same_uri_paths_as_an_import(sheet, importer, rdmo, tmp_path):
+    path = sheet()
+    root = export(path, str(tmp_path / 'catalog.xml'))
+    importer().import_to_rdmo(path)
+    for kind in ('catalog', 'section', 'questionset', 'question'):
+        exported = {element.findtext('uri_path') for element in root if element.tag == kind}
+        assert exported == {element['uri_path'] for element in rdmo.elements[kind].values()}
+    exported = {element.findtext('path') for element in root if element.tag == 'attribute'}
+    assert exported == {element['path'] for element in rdmo.elements['attribute'].values()}
+
+def test_invalid_sheet_is_not_exported(sheet, tmp_path):
+    out = str(tmp_path / 'catalog.xml')
+    with pytest.raises(ValidationError):
+        export(sheet([ROWS[0], ROWS[0]]), out)
+    assert not os.path.exists(out)
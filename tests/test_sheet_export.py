@@ -0,0 +1,48 @@
+import pytest
+
+from xlsx2rdmo_lite.spreadsheet import read_rows, write_lines
+
+from conftest import writes
+
+HEADER = [0, 1, 2, 'frage_de', 'frage_en', 'widgettype', 'valuetype', 'optionset', 'options']
+
+ROWS = [
+    ['Catalog', 'Section 1', 'Set 1', 'First question', 'first', 'text', '', '', ''],
+    ['Catalog', 'Section 1', 'Set 1', 'Second question', 'second', 'textarea', 'integer', '', ''],
+    ['Catalog', 'Section 1', 'Set 2', 'Color', 'color', 'select', '', 'colors', 'Rot | red; Blau | blue'],
+    ['Catalog', 'Section 2', 'Set 3', 'Other color', 'other color', 'radio', '', 'colors', ''],
+]
+
+
+def columns(row):
+    return [getattr(row, name) for name in (
+        'catalog', 'section', 'questionset', 'frage_de', 'frage_en', 'widgettype', 'valuetype', 'optionset', 'options'
+    )]
+
+
+@pytest.mark.parametrize('name', ['export.xlsx', 'export.csv'])
+def test_exported_catalog_imports_without_changes(tmp_path, rdmo, importer, name):
+    path = str(tmp_path / 'catalog.xlsx')
+    write_lines(path, [HEADER] + ROWS)
+    importer().import_to_rdmo(path)
+
+    out = str(tmp_path / name)
+    importer().export_xlsx('Catalog', out)
+    assert [columns(row) for row in read_rows(out)] == ROWS
+
+    del rdmo.requests[:]
+    assert len(importer().plan(out)) == 0
+    importer().import_to_rdmo(out)
+    assert writes(rdmo) == []
+
+def test_export_by_uri_path(tmp_path, sheet, importer):
+    importer().import_to_rdmo(sheet())
+    out = str(tmp_path / 'export.csv')
+    importer().export_xlsx('catalog', out)
+    assert [row.frage_de for row in read_rows(out)] == [
+        'First question', 'Second question', 'Third question', 'Fourth question'
+    ]
+
+def test_unknown_catalog(tmp_path, importer):
+    with pytest.raises(KeyError, match='Missing'):
+        importer().export_xlsx('Missing', str(tmp_path / 'export.csv'))
@@ -0,0 +1,95 @@
+import zipfile
+
+import pytest
+
+from xlsx2rdmo_lite.spreadsheet import read_options, read_rows, write_lines
+
+from conftest import HEADER, ROWS
+
+ODS = '''<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+    xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+    xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">
+<office:body><office:spreadsheet>{}</office:spreadsheet></office:body>
+</office:document-content>'''
+
+
+def ods_cell(value):
+    if value == '':
+        return '<table:table-cell/>'
+    if isinstance(value, (int, float)):
+        return '<table:table-cell office:value-type="float" office:value="{0}"><text:p>{0}</text:p></table:table-cell>'.format(value)
+    return '<table:table-cell office:value-type="string"><text:p>{}</text:p></table:table-cell>'.format(value)
+
+def write_ods(path, sheets):
+    # sheets: {name: lines}; an empty line is a blank row, and the sheet
+    # ends with a huge block of blank rows like LibreOffice writes it
+    tables = []
+    for name, lines in sheets.items():
+        rows = ''.join(
+            '<table:table-row>{}</table:table-row>'.format(''.join(ods_cell(value) for value in line) or ods_cell(''))
+            for line in lines
+        )
+        rows += '<table:table-row table:number-rows-repeated="1048000"><table:table-cell/></table:table-row>'
+        tables.append('<table:table table:name="{}">{}</table:table>'.format(name, rows))
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('content.xml', ODS.format(''.join(tables)))
+
+def write(path, lines):
+    if path.endswith('.ods'):
+        write_ods(path, {'Sheet1': lines})
+    else:
+        write_lines(path, lines)
+
+
+@pytest.mark.parametrize('ext', ['xlsx', 'ods', 'csv'])
+def test_read_rows(tmp_path, ext):
+    path = str(tmp_path / ('catalog.' + ext))
+    write(path, [HEADER] + ROWS)
+    rows = list(read_rows(path))
+    assert [(row.catalog, row.section, row.questionset, row.frage_de, row.frage_en, row.widgettype)
+            for row in rows] == [tuple(row) for row in ROWS]
+    assert [row.line for row in rows] == [2, 3, 4, 5]
+    assert all(row.comment == '' and row.extra is None for row in rows)
+
+@pytest.mark.parametrize('ext', ['xlsx', 'ods', 'csv'])
+def test_blank_rows_keep_the_line_numbers(tmp_path, ext):
+    path = str(tmp_path / ('catalog.' + ext))
+    write(path, [HEADER, ROWS[0], [], [], ROWS[1]])
+    assert [row.line for row in read_rows(path)] == [2, 5]
+
+@pytest.mark.parametrize('ext', ['xlsx', 'ods', 'csv'])
+def test_extra_columns(tmp_path, ext):
+    path = str(tmp_path / ('catalog.' + ext))
+    write(path, [HEADER + ['note'], ROWS[0] + ['remember']])
+    assert next(read_rows(path)).extra == {'note': 'remember'}
+
+@pytest.mark.parametrize('ext', ['xlsx', 'ods'])
+def test_numbers(tmp_path, ext):
+    path = str(tmp_path / ('catalog.' + ext))
+    write(path, [HEADER, ['Catalog', 'Section', 'Set', 2024, 1.5, 'text']])
+    row = next(read_rows(path))
+    assert (row.frage_de, row.frage_en) == (2024, 1.5)
+
+@pytest.mark.parametrize('ext', ['xlsx', 'ods', 'csv'])
+def test_missing_column(tmp_path, ext):
+    path = str(tmp_path / ('catalog.' + ext))
+    write(path, [HEADER[:-1], ROWS[0][:-1]])
+    with pytest.raises(ValueError, match='widgettype'):
+        list(read_rows(path))
+
+def test_options_sheet_of_ods(tmp_path):
+    path = str(tmp_path / 'catalog.ods')
+    write_ods(path, {
+        'Sheet1': [HEADER] + ROWS,
+        'options': [['optionset', 'option_de', 'option_en'], ['Colors', 'Rot', 'red'], ['Colors', 'Blau', 'blue']],
+    })
+    assert [(o.optionset, o.text_de, o.text_en) for o in read_options(path)] == [
+        ('Colors', 'Rot', 'red'), ('Colors', 'Blau', 'blue'),
+    ]
+    assert len(list(read_rows(path))) == len(ROWS)
+
+def test_no_options_sheet(tmp_path):
+    path = str(tmp_path / 'catalog.xlsx')
+    write_lines(path, [HEADER] + ROWS)
+    assert list(read_options(path)) == []
@@ -0,0 +1,133 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+
+from xlsx2rdmo_lite.transport import Client, RateLimiter
+
+
+class Server:
+    # a local http server answering with the scripted responses, in order
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def handle_request(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length) if length else b''
+                server.requests.append((self.command, self.path, body and json.loads(body)))
+                status, headers, data = server.responses.pop(0)
+                content = json.dumps(data).encode('utf-8') if data is not None else b''
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{}'.format(self.httpd.server_port)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def answer(self, status, data=None, **headers):
+        self.responses.append((status, headers, data))
+
+
+@pytest.fixture
+def server():
+    server = Server()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # the delays of the retries, without waiting
+    delays = []
+    monkeypatch.setattr('xlsx2rdmo_lite.transport.time.sleep', delays.append)
+    return delays
+
+
+def test_methods_and_token(server):
+    server.answer(200, [{'id': 1}])
+    server.answer(201, {'id': 2})
+    server.answer(200, {'id': 2})
+    server.answer(204)
+    client = Client(server.url, token='secret')
+    assert client.list_catalogs(uri_path='c') == [{'id': 1}]
+    assert client.create_question({'uri_path': 'q'}) == {'id': 2}
+    assert client.update_question(2, {'uri_path': 'q'}) == {'id': 2}
+    assert client.destroy_question(2) is None
+    assert [request[:2] for request in server.requests] == [
+        ('GET', '/api/v1/questions/catalogs/?uri_path=c'),
+        ('POST', '/api/v1/questions/questions/'),
+        ('PUT', '/api/v1/questions/questions/2/'),
+        ('DELETE', '/api/v1/questions/questions/2/'),
+    ]
+    assert client.session.headers['Authorization'] == 'Token secret'
+
+def test_temporary_errors_are_retried(server, sleeps):
+    server.answer(503)
+    server.answer(502)
+    server.answer(200, [])
+    assert Client(server.url, retries=3).list_attributes() == []
+    assert len(server.requests) == 3
+    assert len(sleeps) == 2
+
+def test_retries_give_up(server, sleeps):
+    for _ in range(3):
+        server.answer(503)
+    with pytest.raises(requests.HTTPError):
+        Client(server.url, retries=2).list_attributes()
+    assert len(server.requests) == 3
+
+def test_retry_after(server, sleeps):
+    server.answer(429, **{'Retry-After': '7'})
+    server.answer(200, [])
+    Client(server.url, backoff=0.01).list_attributes()
+    assert sleeps == [7.0]
+
+def test_post_is_not_repeated_after_reaching_the_server(server, sleeps):
+    server.answer(503)
+    with pytest.raises(requests.HTTPError):
+        Client(server.url).create_catalog({'uri_path': 'c'})
+    assert len(server.requests) == 1
+    assert sleeps == []
+
+def test_post_is_repeated_when_rate_limited(server, sleeps):
+    server.answer(429)
+    server.answer(201, {'id': 1})
+    assert Client(server.url).create_catalog({'uri_path': 'c'}) == {'id': 1}
+    assert len(server.requests) == 2
+
+def test_post_is_repeated_when_the_connection_is_refused(sleeps):
+    with socket.socket() as s: #a port nobody listens on
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    with pytest.raises(requests.ConnectionError):
+        Client('http://127.0.0.1:{}'.format(port), retries=2).create_catalog({'uri_path': 'c'})
+    assert len(sleeps) == 2
+
+def test_error_body_is_kept(server):
+    server.answer(400, {'uri_path': ['catalog with this uri_path already exists.']})
+    with pytest.raises(requests.HTTPError) as error:
+        Client(server.url).create_catalog({'uri_path': 'c'})
+    assert '400 Client Error' in str(error.value)
+    assert 'already exists' in str(error.value)
+    assert error.value.response.status_code == 400
+
+def test_rate_limiter():
+    limiter = RateLimiter(10, burst=2)
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(0.1, abs=0.01)
@@ -0,0 +1,48 @@
+import pytest
+
+from xlsx2rdmo_lite.validate import ValidationError, validate
+
+from conftest import ROWS, writes
+
+
+def messages(report):
+    return [(issue.line, issue.column, issue.message) for issue in report.errors]
+
+
+def test_valid_sheet(sheet):
+    assert len(validate(sheet())) == 0
+
+@pytest.mark.parametrize('column, value', [(0, '...'), (1, '???'), (2, '-'), (3, '!!!')])
+def test_names_without_letters_or_digits(sheet, column, value):
+    row = list(ROWS[0])
+    row[column] = value
+    errors = messages(validate(sheet([row])))
+    assert len(errors) == 1
+    assert errors[0][0] == 2
+    assert 'has no letters or digits' in errors[0][2]
+
+def test_unusable_section_is_rejected_before_any_request(sheet, importer, rdmo):
+    row = ['Catalog', '???', 'Set', 'Question', '', 'text']
+    with pytest.raises(ValidationError):
+        importer().import_to_rdmo(sheet([row]))
+    assert writes(rdmo) == []
+
+def test_collision_after_truncating_frage_de(sheet):
+    long = 'a very long question ' * 6
+    rows = [['Catalog', 'Section', 'Set', long + 'one', '', 'text'],
+            ['Catalog', 'Section', 'Set', long + 'two', '', 'text']]
+    (line, column, message), = messages(validate(sheet(rows)))
+    assert (line, column) == (3, 'frage_de')
+    assert 'collides with line 2' in message
+    assert 'truncating frage_de to 100 characters' in message
+
+def test_empty_names_and_duplicates(sheet):
+    rows = [ROWS[0], ROWS[0], ['Catalog', '', 'Set', 'Question', '', 'text']]
+    errors = messages(validate(sheet(rows)))
+    assert (3, 'frage_de', 'duplicate question (line 2), the row is skipped') in errors
+    assert (4, 'section', 'empty section') in errors
+
+def test_unsupported_widgettype_is_a_warning(sheet):
+    report = validate(sheet([ROWS[0][:5] + ['slider']]))
+    assert report.ok
+    assert [issue.column for issue in report.warnings] == ['widgettype']